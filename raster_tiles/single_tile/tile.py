@@ -1,7 +1,6 @@
 import os
 import logging
 import sqlite3
-import warnings
 import asyncio
 
 from typing import List, Optional, Tuple
@@ -34,8 +33,6 @@ async def tile(
     reader: Optional[Reader] = None,
     tile_job: Optional[sqlite3.Row] = None,
 ) -> Tuple[Optional[bytes], List[NeighborTile]]:
-    # ignore warnings from rio-tiler, rasterio
-    warnings.filterwarnings("ignore")
 
     db_path: str = os.path.join(root_path, "data", datasource_id, f"{dataset}.db")
     if tile_job is None:
@@ -114,8 +111,6 @@ async def mosaic_tile(
     mbtiles: bool,
     tile_job: Optional[sqlite3.Row] = None,
 ) -> Tuple[Optional[bytes], List[NeighborTile]]:
-    # ignore warnings from rio-tiler, rasterio
-    warnings.filterwarnings("ignore")
 
     db_path: str = os.path.join(root_path, "data", datasource_id, f"{dataset}.db")
     if tile_job is None:
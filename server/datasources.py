@@ -1,9 +1,12 @@
 import os
+import re
 import orjson
 import logging
+import asyncio
 import multiprocessing
 
-from typing import Optional, Dict, Any, List, Union, Tuple
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Union, Tuple, Callable
 from enum import StrEnum
 
 from fastapi import FastAPI
@@ -20,6 +23,20 @@ BUFFER = 64
 EXTENT = 4096
 MINZOOM = 0
 MAXZOOM = 20
+ZOOMS = range(MINZOOM, MAXZOOM + 1)
+CPU_COUNT = multiprocessing.cpu_count()
+WHITESPACE = re.compile(r"\s+")
+
+# UUID and datetime are native to orjson, numpy arrays of rasters need the option
+ORJSON_OPTIONS = (
+    orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+)
+
+
+def value_or_default(d: Dict[str, Any], key: str, default: Any) -> Any:
+    # Optional fields of DataSource may be stored as explicit null
+    value: Any = d.get(key)
+    return default if value is None else value
 
 
 class DataType(StrEnum):
@@ -68,13 +85,16 @@ class Extensions(StrEnum):
     TIFF = "TIFF"
 
 
+# Coercion of encoding values to EncodingType members, a few distinct values only
+to_encoding_type = lru_cache(maxsize=8)(EncodingType)
+
 VECTOR = DataType.vector
 RASTER = DataType.raster
-DATA_TYPE = set(dt.value for dt in DataType)
-STORE_TYPE = set(st.value for st in StoreType)
-LAYER_TYPE = set(lt.value for lt in LayerType)
-EXTENSIONS = set(ext.value for ext in Extensions)
-RESAMPLING = set(rt.value for rt in ResamplingType)
+DATA_TYPE = frozenset(DataType._value2member_map_)
+STORE_TYPE = frozenset(StoreType._value2member_map_)
+LAYER_TYPE = frozenset(LayerType._value2member_map_)
+EXTENSIONS = frozenset(Extensions._value2member_map_)
+RESAMPLING = frozenset(ResamplingType._value2member_map_)
 
 
 # ============================== Raster ==============================
@@ -113,7 +133,7 @@ class DataStoreRasterInternal:
         if folder is not None and self.dataset is None:
             self.dataset = folder
 
-        self.encoding = EncodingType("f32")
+        self.encoding = EncodingType.f32
 
 
 class DataStoreRasterMBTiles:
@@ -123,7 +143,7 @@ class DataStoreRasterMBTiles:
         self.type = DataType.raster
         self.store = StoreType.mbtiles
         self.path = path
-        self.encoding = EncodingType(encoding_type)
+        self.encoding = to_encoding_type(encoding_type)
 
 
 class DataStoreRasterTiles:
@@ -133,7 +153,7 @@ class DataStoreRasterTiles:
         self.type = DataType.raster
         self.store = StoreType.tiles
         self.tiles = tiles
-        self.encoding = EncodingType(encoding_type)
+        self.encoding = to_encoding_type(encoding_type)
 
 
 class DataStoreRasterTileJson:
@@ -143,7 +163,7 @@ class DataStoreRasterTileJson:
         self.type = DataType.raster
         self.store = StoreType.tilejson
         self.url = url
-        self.encoding = EncodingType(encoding_type)
+        self.encoding = to_encoding_type(encoding_type)
 
 
 # ============================== Vector ==============================
@@ -219,7 +239,8 @@ class LayerQuerySQL:
     ):
         self.minzoom = minzoom
         self.maxzoom = maxzoom
-        self.sql = sql
+        # SQL is used as subquery of every tile, it is normalized once on load
+        self.sql = WHITESPACE.sub(" ", sql.strip()).replace(";", "")
 
     def __str__(self):
         return f"SubQuerySQL(minzoom = {self.minzoom}, maxzoom = {self.maxzoom}, sql = '{self.sql}')"
@@ -254,10 +275,13 @@ class Field:
         return f"Field(name = {self.name}, name_in_db = {self.name_in_db}, encode = {self.encode})"
 
 
-def is_encode_field(field: Field, geom_field: str) -> bool:
-    if field.name_in_db != geom_field and field.encode:
-        return True
-    return False
+@lru_cache(maxsize=1024)
+def compile_where_clause(
+    jfe: str, geom_field: str, field_mapping: Tuple[Tuple[str, str], ...]
+) -> str:
+    # Identical filters of layers are parsed and translated to SQL once per process
+    parsed_jfe: Node = parse_jfe(jfe, geom_field)
+    return to_sql_where(parsed_jfe, dict(field_mapping))
 
 
 class VectorDataLayer:
@@ -278,6 +302,7 @@ class VectorDataLayer:
         "where_clause",
         "select",
         "query",
+        "queries_by_zoom",
     )
 
     def __init__(
@@ -311,39 +336,53 @@ class VectorDataLayer:
         self.where_clause: Optional[str] = None
 
         if fields is not None:
-            # Query and encoding geometry + attributes from fields where encode=true
-            encode_fields: List[str] = [
-                f"t.{field.name_in_db}"
-                for field in fields
-                if is_encode_field(field, geom_field)
-            ]
+            # Single pass over fields:
+            # - attributes from fields where encode=true are encoded with geometry
+            # - all attributes except geometry are queried from layer
+            encode_fields: List[str] = []
+            base_fields: List[str] = []
+            field_mapping: Dict[str, str] = {}
+            for field in fields:
+                name_in_db: str = field.name_in_db
+                field_mapping[field.name] = name_in_db
+                if name_in_db == geom_field:
+                    continue
+                base_fields.append('"' + name_in_db + '"')
+                if field.encode:
+                    encode_fields.append("t." + name_in_db)
+
             if len(encode_fields) > 0:
                 self.fields_from_subquery = ", " + ", ".join(encode_fields)
-
-            base_fields: List[str] = [
-                f'"{field.name_in_db}"'
-                for field in fields
-                if field.name_in_db != geom_field
-            ]
             if len(base_fields) > 0:
                 fields_query: str = ", " + ", ".join(base_fields)
             else:
                 fields_query = ""
 
             self.select: str = f'SELECT "{geom_field}"{fields_query} FROM {store_layer}'
-            self.field_mapping = {field.name: field.name_in_db for field in fields}
+            self.field_mapping = field_mapping
         else:
             # Query only geometry from layer
             self.select = f'SELECT "{geom_field}" FROM {store_layer}'
 
         if filter is not None and self.field_mapping is not None:
-            parsed_jfe: Node = parse_jfe(filter, geom_field)
-            self.where_clause: str = to_sql_where(parsed_jfe, self.field_mapping)
+            self.where_clause: str = compile_where_clause(
+                orjson.dumps(filter).decode(),
+                geom_field,
+                tuple(self.field_mapping.items()),
+            )
         if self.where_clause is not None and self.where_clause != "":
             self.query = f"{self.select} WHERE {self.where_clause}"
         else:
             self.query = self.select
 
+        # SQL queries of layer for every zoom, tiles don't filter queries by zoom
+        self.queries_by_zoom: Optional[List[List[LayerQuerySQL]]] = None
+        if queries is not None:
+            self.queries_by_zoom = [
+                [query for query in queries if query.minzoom <= z <= query.maxzoom]
+                for z in ZOOMS
+            ]
+
 
 class TileCacheParam:
     __slots__ = ("maxzoom", "maxsize", "preseed", "preseed_maxzoom")
@@ -381,185 +420,234 @@ class DataSourceCenter:
 
 
 class RasterTileSettings:
+    __slots__ = (
+        "verbose",
+        "resampling",
+        "tiledriver",
+        "tile_size",
+        "xyz",
+        "count_processes",
+        "minzoom",
+        "maxzoom",
+        "mbtiles",
+        "warnings",
+        "save_tile_detail_db",
+        "warp",
+        "resampling_warp",
+        "remove_processing_raster_files",
+        "encode_to_rgba",
+        "mosaic_merge",
+        "nodata_default",
+        "pixel_selection_method",
+        "merge",
+    )
+
     def __init__(self, ds: Dict[str, Any]):
-        verbose = ds.get("verbose")
-        if verbose is not None:
-            self.verbose: bool = verbose
-        else:
-            self.verbose = False
+        self.verbose: bool = value_or_default(ds, "verbose", False)
+        self.resampling: str = value_or_default(ds, "resampling", "average")
+        self.tiledriver: str = value_or_default(ds, "tiledriver", "PNG")
+        self.tile_size: int = value_or_default(ds, "tile_size", 256)
+        self.xyz: bool = value_or_default(ds, "xyz", True)
+        self.count_processes: int = value_or_default(ds, "count_processes", CPU_COUNT)
+        self.minzoom: int = value_or_default(ds, "minzoom", MINZOOM)
+        self.maxzoom: int = value_or_default(ds, "maxzoom", MINZOOM)
+        self.mbtiles: bool = value_or_default(ds, "mbtiles", True)
+        self.warnings: bool = value_or_default(ds, "warnings", False)
+        self.save_tile_detail_db: bool = value_or_default(
+            ds, "save_tile_detail_db", True
+        )
+        self.warp: bool = value_or_default(ds, "warp", False)
+        self.resampling_warp: str = value_or_default(ds, "resampling_warp", "average")
+        self.remove_processing_raster_files: bool = value_or_default(
+            ds, "remove_processing_raster_files", False
+        )
+        self.encode_to_rgba: bool = value_or_default(ds, "encode_to_rgba", True)
+        self.mosaic_merge: bool = value_or_default(ds, "mosaic_merge", False)
+        self.nodata_default: float = value_or_default(ds, "nodata_default", -999999)
+        self.pixel_selection_method: str = value_or_default(
+            ds, "pixel_selection_method", "FirstMethod"
+        )
+        self.merge: bool = value_or_default(ds, "merge", True)
 
-        self.resampling: str = ds.get("resampling") or "average"
-        self.tiledriver: str = ds.get("tiledriver") or "PNG"
-        self.tile_size: int = ds.get("tile_size") or 256
 
-        xyz = ds.get("xyz")
-        if xyz is not None:
-            self.xyz: bool = xyz
-        else:
-            self.xyz = True
+class VectorTileSettings:
+    __slots__ = ("count_processes", "minzoom", "maxzoom")
 
-        self.count_processes: int = (
-            ds.get("count_processes") or multiprocessing.cpu_count()
-        )
-        self.minzoom: int = ds.get("minzoom") or MINZOOM
-        self.maxzoom: int = ds.get("maxzoom") or MINZOOM
+    def __init__(self, ds: Dict[str, Any]):
+        self.count_processes: int = value_or_default(ds, "count_processes", CPU_COUNT)
+        self.minzoom: int = value_or_default(ds, "minzoom", MINZOOM)
+        self.maxzoom: int = value_or_default(ds, "maxzoom", MINZOOM)
 
-        mbtiles = ds.get("mbtiles")
-        if mbtiles is not None:
-            self.mbtiles: bool = mbtiles
-        else:
-            self.mbtiles = True
 
-        self.warnings: bool = ds.get("warnings") or False
+def setup_vector_internal_store(data_store_dict: Dict[str, Any]) -> DataStoreVector:
+    # Generating tiles offline from OSM data using PostGIS
+    return DataStoreVectorInternal()
 
-        save_tile_detail_db = ds.get("save_tile_detail_db")
-        if save_tile_detail_db is not None:
-            self.save_tile_detail_db: bool = save_tile_detail_db
-        else:
-            self.save_tile_detail_db = True
 
-        self.warp: bool = ds.get("warp") or False
-        self.resampling_warp: str = ds.get("resampling_warp") or "average"
-        self.remove_processing_raster_files: bool = (
-            ds.get("remove_processing_raster_files") or False
-        )
+def setup_vector_tiles_store(data_store_dict: Dict[str, Any]) -> DataStoreVector:
+    # Use external tiles from MapTiler
+    tiles: List[str] = data_store_dict.get("tiles")
+    keys: Optional[List[str]] = data_store_dict.get("keys")
+    return DataStoreVectorTiles(tiles, keys)
 
-        encode_to_rgba = ds.get("encode_to_rgba")
-        if encode_to_rgba is not None:
-            self.encode_to_rgba: bool = encode_to_rgba
-        else:
-            self.encode_to_rgba = True
 
-        self.mosaic_merge: bool = ds.get("mosaic_merge") or False
-        self.nodata_default: float = ds.get("nodata_default") or -999999
-        self.pixel_selection_method: str = (
-            ds.get("pixel_selection_method") or "FirstMethod"
-        )
+def setup_raster_internal_store(data_store_dict: Dict[str, Any]) -> DataStoreRaster:
+    # Defaults host, port for PostgreSQL
+    return DataStoreRasterInternal(
+        data_store_dict.get("host"),
+        data_store_dict.get("port"),
+        data_store_dict.get("dataset"),
+        file=data_store_dict.get("file"),
+        folder=data_store_dict.get("folder"),
+    )
 
-        merge = ds.get("merge")
-        if merge is not None:
-            self.merge: bool = merge
-        else:
-            self.merge = True
 
+def setup_raster_tiles_store(data_store_dict: Dict[str, Any]) -> DataStoreRaster:
+    # Use external tiles, encoding is defined by DataSource
+    tiles: List[str] = data_store_dict.get("tiles")
+    return DataStoreRasterTiles(tiles, EncodingType.f32)
 
-class VectorTileSettings:
-    def __init__(self, ds: Dict[str, Any]):
-        self.count_processes: int = (
-            ds.get("count_processes") or multiprocessing.cpu_count()
-        )
-        self.minzoom: int = ds.get("minzoom") or MINZOOM
-        self.maxzoom: int = ds.get("maxzoom") or MINZOOM
+
+DATA_STORE_BUILDERS: Dict[Tuple[str, str], Callable[[Dict[str, Any]], DataStore]] = {
+    (DataType.vector, StoreType.internal): setup_vector_internal_store,
+    (DataType.vector, StoreType.tiles): setup_vector_tiles_store,
+    (DataType.raster, StoreType.internal): setup_raster_internal_store,
+    (DataType.raster, StoreType.tiles): setup_raster_tiles_store,
+}
 
 
 def setup_data_store(store: str, data_store_dict: Dict[str, Any]) -> DataStore:
     data_store_type: str = data_store_dict.get("type")
-    assert (
-        data_store_type in DATA_TYPE
-    ), f"Data store type must have one of the values {DATA_TYPE}, but got '{data_store_type}'"
-
-    # Vector data
-    if data_store_type == DataType.vector:
-        if store == StoreType.mbtiles:
-            raise Exception(f"Vector Store type '{StoreType.mbtiles}' not implemented")
-        elif store == StoreType.internal:
-            # Internal case
-            # Generating tiles offline from OSM data using PostGIS
-            return DataStoreVectorInternal()
-
-        elif store == StoreType.tiles:
-            # Use external tiles from MapTiler
-            # raise Exception(f"Vector Store type '{StoreType.tiles}' not implemented")
-            tiles: List[str] = data_store_dict.get("tiles")
-            assert isinstance(
-                tiles, list
-            ), f"'tiles' has wrong format: {tiles}, must be a List"
-            keys: List[str] = data_store_dict.get("keys")
-            return DataStoreVectorTiles(tiles, keys)
-
-        elif store == StoreType.tilejson:
-            raise Exception(f"Vector Store type '{StoreType.tilejson}' not implemented")
-        else:
-            raise Exception(f"Vector Store type '{store}' unsupported")
-
-    # Raster data
-    if data_store_type == DataType.raster:
-        if store == StoreType.mbtiles:
-            raise Exception(f"Raster Store type '{StoreType.mbtiles}' not implemented")
-        elif store == StoreType.internal:
-            # Internal case
-            # Defaults host, port for PostgreSQL
-            host: str = data_store_dict.get("host")
-            port: int = data_store_dict.get("port")
-            dataset: str = data_store_dict.get("dataset")
-            file: Optional[str] = data_store_dict.get("file")
-            folder: Optional[str] = data_store_dict.get("folder")
-
-            return DataStoreRasterInternal(
-                host,
-                port,
-                dataset,
-                file=file,
-                folder=folder,
+    builder: Optional[Callable[[Dict[str, Any]], DataStore]] = DATA_STORE_BUILDERS.get(
+        (data_store_type, store)
+    )
+    if builder is None:
+        if store in STORE_TYPE:
+            raise Exception(
+                f"{str(data_store_type).capitalize()} Store type '{store}' not implemented"
             )
+        raise Exception(
+            f"{str(data_store_type).capitalize()} Store type '{store}' unsupported"
+        )
 
-        elif store == StoreType.tiles:
-            # Use external tiles from MapTiler
-            # raise Exception(f"Vector Store type '{StoreType.tiles}' not implemented")
-            tiles = data_store_dict.get("tiles")
-            assert isinstance(
-                tiles, list
-            ), f"'tiles' has wrong format: {tiles}, must be a List"
-            return DataStoreRasterTiles(tiles)
-
-        elif store == StoreType.tilejson:
-            raise Exception(f"Vector Store type '{StoreType.tilejson}' not implemented")
-        else:
-            raise Exception(f"Vector Store type '{store}' unsupported")
+    return builder(data_store_dict)
+
+
+def validate_common_data(data: Dict[str, Any]) -> Optional[str]:
+    data_store: Any = data.get("dataStore")
+    if not isinstance(data_store, dict):
+        return f"'dataStore' has wrong type: {data_store}"
+
+    store: Optional[str] = data_store.get("store")
+    if store not in STORE_TYPE:
+        return f"'store' must have one of the values {sorted(STORE_TYPE)}, but got '{store}'"
+
+    data_store_type: Optional[str] = data_store.get("type")
+    if data_store_type not in DATA_TYPE:
+        return f"Data store type must have one of the values {sorted(DATA_TYPE)}, but got '{data_store_type}'"
+
+    if store == StoreType.tiles:
+        tiles: Any = data_store.get("tiles")
+        if not isinstance(tiles, list):
+            return f"'tiles' has wrong format: {tiles}, must be a List"
+
+    bounds: Any = data.get("bounds")
+    if bounds is not None and not (isinstance(bounds, dict) and len(bounds) == 4):
+        return f"'bounds' has wrong type: {bounds}"
+
+    center: Any = data.get("center")
+    if center is not None and not (
+        isinstance(center, list) and (len(center) == 3 or len(center) == 2)
+    ):
+        return f"'center' has wrong format: {center}"
+
+    return None
+
+
+def validate_raster_data(data: Dict[str, Any]) -> Optional[str]:
+    data_type: Any = data.get("type")
+    if data_type != DataType.raster:
+        return f"Type of raster datasource must have '{DataType.raster}', but got '{data_type}'"
+
+    return validate_common_data(data)
+
+
+def validate_vector_data(data: Dict[str, Any]) -> Optional[str]:
+    data_type: Any = data.get("type")
+    if data_type != DataType.vector:
+        return f"Type of vector datasource must have '{DataType.vector}', but got '{data_type}'"
+
+    message: Optional[str] = validate_common_data(data)
+    if message is not None:
+        return message
+
+    # Layers are processed for internal store type only
+    if data["dataStore"]["store"] == StoreType.internal:
+        layers: Any = data.get("layers")
+        if not (isinstance(layers, list) and len(layers) > 0):
+            return f"'layers' has wrong format: {layers}"
+
+        for layer in layers:
+            if not isinstance(layer, dict):
+                return f"'layer' has wrong format: {layer}"
+            fields: Any = layer.get("fields")
+            if isinstance(fields, list):
+                for field in fields:
+                    if not isinstance(field, dict):
+                        return f"'field' has wrong format: {field}"
+            queries: Any = layer.get("queries")
+            if isinstance(queries, list):
+                for query in queries:
+                    if not isinstance(query, dict):
+                        return f"'query' has wrong format: {query}"
+
+    return None
 
 
 class DataSourceRaster:
+    __slots__ = (
+        "id",
+        "type",
+        "mosaics",
+        "data_store",
+        "mbtiles",
+        "bounds",
+        "center",
+        "minzoom",
+        "maxzoom",
+        "pyr_settings",
+        "encoding",
+        "use_cache_only",
+        "compress_tiles",
+    )
+
     def __init__(self, ds: Dict[str, Any]):
         self.id = ds.get("id")
 
         data_type = ds.get("type")
-        assert (
-            data_type == DataType.raster
-        ), f"Type of raster datasource must have '{DataType.raster}', but got '{data_type}'"
         self.type = DataType(data_type)
 
         self.mosaics = ds.get("mosaics")
 
         data_store: Dict[str, Any] = ds.get("dataStore")
-        assert isinstance(data_store, dict), f"'dataStore' has wrong type: {data_store}"
-
         store: str = data_store.get("store")
-        assert (
-            store in STORE_TYPE
-        ), f"'store' must have one of the values {STORE_TYPE}, but got '{store}'"
         self.data_store = setup_data_store(store, data_store)
-        self.mbtiles = ds.get("mbtiles") or False
+        self.mbtiles = value_or_default(ds, "mbtiles", False)
 
         bounds = ds.get("bounds")
         if bounds is not None:
-            assert (
-                isinstance(bounds, dict) and len(bounds) == 4
-            ), f"'bounds' has wrong type: {bounds}"
             self.bounds: DataSourceBounds = DataSourceBounds(**bounds)
         else:
             self.bounds = None
 
         center = ds.get("center")
         if center is not None:
-            assert isinstance(center, list) and (
-                len(center) == 3 or len(center) == 2
-            ), f"'center' has wrong format: {center}"
             self.center: DataSourceCenter = DataSourceCenter(*center)
         else:
             self.center = None
 
-        self.minzoom: int = ds.get("minzoom") or MINZOOM
-        self.maxzoom: int = ds.get("maxzoom") or 13
+        self.minzoom: int = value_or_default(ds, "minzoom", MINZOOM)
+        self.maxzoom: int = value_or_default(ds, "maxzoom", 13)
 
         pyr_settings: Optional[Dict[str, Any]] = ds.get("pyramidSettings")
         if pyr_settings is not None:
@@ -568,14 +656,44 @@ class DataSourceRaster:
             self.pyr_settings = RasterTileSettings({})
 
         self.pyr_settings.mbtiles = self.mbtiles
-        enc: str = ds.get("encoding") or "f32"
-        self.encoding = EncodingType(enc)
-        self.data_store.encoding = EncodingType(enc)
+        enc: str = value_or_default(ds, "encoding", "f32")
+        self.encoding = to_encoding_type(enc)
+        self.data_store.encoding = self.encoding
 
         self.use_cache_only = ds.get("use_cache_only", False)
         self.compress_tiles = ds.get("compress_tiles", False)
 
 
+def setup_vector_layer(layer: Dict[str, Any]) -> VectorDataLayer:
+    identifier: str = layer.get("id")
+    layer_type: LayerType = LayerType(layer.get("type"))
+    store_layer: str = layer.get("storeLayer")
+
+    fields: Optional[List[Field]] = None
+    _fields: Optional[List[Dict[str, Any]]] = layer.get("fields")
+    if isinstance(_fields, list):
+        fields = [Field(**_field) for _field in _fields]
+
+    queries: Optional[List[LayerQuerySQL]] = None
+    _queries: Optional[List[Dict[str, Any]]] = layer.get("queries")
+    if isinstance(_queries, list):
+        queries = [LayerQuerySQL(**_query) for _query in _queries]
+
+    return VectorDataLayer(
+        identifier,
+        layer_type,
+        store_layer,
+        layer.get("geomField"),
+        layer.get("description") or f"{identifier}, {layer_type}, {store_layer}",
+        value_or_default(layer, "minzoom", MINZOOM),
+        value_or_default(layer, "maxzoom", MAXZOOM),
+        value_or_default(layer, "simplify", False),
+        layer.get("filter"),
+        fields,
+        queries,
+    )
+
+
 class DataSourceVector:
     __slots__ = (
         "id",
@@ -594,6 +712,7 @@ class DataSourceVector:
         "bounds",
         "center",
         "layers",
+        "layers_by_zoom",
         "use_cache_only",
         "compress_tiles",
     )
@@ -602,22 +721,12 @@ class DataSourceVector:
         self.id: str = ds.get("id")
 
         data_type = ds.get("type")
-        assert (
-            data_type == DataType.vector
-        ), f"Type of vector datasource must have '{DataType.vector}', but got '{data_type}'"
         self.type: DataType = DataType(data_type)
 
         data_store_dict = ds.get("dataStore")
-        assert isinstance(
-            data_store_dict, dict
-        ), f"'dataStore' has wrong type: {data_store_dict}"
-
         store = data_store_dict.get("store")
-        assert (
-            store in STORE_TYPE
-        ), f"'store' must have one of the values {STORE_TYPE}, but got '{store}'"
         self.data_store: DataStore = setup_data_store(store, data_store_dict)
-        self.mbtiles = ds.get("mbtiles") or False
+        self.mbtiles = value_or_default(ds, "mbtiles", False)
 
         pyr_settings: Optional[Dict[str, Any]] = ds.get("pyramidSettings")
         if pyr_settings is not None:
@@ -629,27 +738,21 @@ class DataSourceVector:
         self.description: Optional[str] = ds.get("description")
         self.version: Optional[str] = ds.get("version")
 
-        self.minzoom: int = ds.get("minzoom") or MINZOOM
-        self.maxzoom: int = ds.get("maxzoom") or MAXZOOM
+        self.minzoom: int = value_or_default(ds, "minzoom", MINZOOM)
+        self.maxzoom: int = value_or_default(ds, "maxzoom", MAXZOOM)
 
-        self.buffer: int = ds.get("buffer") or BUFFER
-        self.extent: int = ds.get("extent") or EXTENT
+        self.buffer: int = value_or_default(ds, "buffer", BUFFER)
+        self.extent: int = value_or_default(ds, "extent", EXTENT)
         self.margin: str = f", margin => ({self.buffer}/{self.extent})"
 
         bounds = ds.get("bounds")
         if bounds is not None:
-            assert (
-                isinstance(bounds, dict) and len(bounds) == 4
-            ), f"'bounds' has wrong type: {bounds}"
             self.bounds: DataSourceBounds = DataSourceBounds(**bounds)
         else:
             self.bounds = None
 
         center = ds.get("center")
         if center is not None:
-            assert isinstance(center, list) and (
-                len(center) == 3 or len(center) == 2
-            ), f"'center' has wrong format: {center}"
             self.center: DataSourceCenter = DataSourceCenter(*center)
         else:
             self.center = None
@@ -663,62 +766,8 @@ class DataSourceVector:
         # TODO: for now layers processing for internal store type
         if isinstance(self.data_store, DataStoreVectorInternal):
             layers = ds.get("layers")
-            assert (
-                isinstance(layers, list) and len(layers) > 0
-            ), f"'layers' has wrong format: {layers}"
-
-            self.layers = []
-            for layer in layers:
-                assert isinstance(layer, dict), f"'layer' has wrong format: {layer}"
-
-                identifier: str = layer.get("id")
-                layer_type: LayerType = LayerType(layer.get("type"))
-                store_layer: str = layer.get("storeLayer")
-                geom_field: str = layer.get("geomField")
-                description: str = (
-                    layer.get("description")
-                    or f"{identifier}, {layer_type}, {store_layer}"
-                )
-
-                minzoom: int = layer.get("minzoom") or MINZOOM
-                maxzoom: int = layer.get("maxzoom") or MAXZOOM
-                simplify: bool = layer.get("simplify") or False
-                filter: Optional[List[Any]] = layer.get("filter")
-                fields: Optional[List[Field]] = None
-                queries: Optional[List[LayerQuerySQL]] = None
-
-                _fields: Optional[List[Field]] = layer.get("fields")
-                if _fields is not None and isinstance(_fields, list):
-                    fields = []
-                    for _field in _fields:
-                        assert isinstance(
-                            _field, dict
-                        ), f"'field' has wrong format: {_field}"
-                        fields.append(Field(**_field))
-
-                _queries: Optional[List[LayerQuerySQL]] = layer.get("queries")
-                if _queries is not None and isinstance(_queries, list):
-                    queries = []
-                    for _query in _queries:
-                        assert isinstance(
-                            _query, dict
-                        ), f"'query' has wrong format: {_query}"
-                        queries.append(LayerQuerySQL(**_query))
-
-                vector_layer: VectorDataLayer = VectorDataLayer(
-                    identifier,
-                    layer_type,
-                    store_layer,
-                    geom_field,
-                    description,
-                    minzoom,
-                    maxzoom,
-                    simplify,
-                    filter,
-                    fields,
-                    queries,
-                )
-                self.layers.append(vector_layer)
+
+            self.layers = [setup_vector_layer(layer) for layer in layers]
 
         elif isinstance(self.data_store, DataStoreVectorTiles):
             pass
@@ -729,9 +778,87 @@ class DataSourceVector:
         else:
             pass
 
+        # Layers visible on every zoom, tiles don't filter layers by zoom
+        self.layers_by_zoom: List[List[VectorDataLayer]] = [
+            [
+                layer
+                for layer in self.layers or ()
+                if layer.minzoom <= z <= layer.maxzoom
+            ]
+            for z in ZOOMS
+        ]
+
 
 DataSource = Union[DataSourceVector, DataSourceRaster]
 
+# DataSources built on previous loads: identifier -> (hash of 'data', DataSource)
+# Rows with unchanged 'data' reuse the object instead of parsing it again
+_datasources_cache: Dict[str, Tuple[str, DataSource]] = {}
+
+QUERY_SELECT_DATASOURCES: str = (
+    "SELECT identifier, data, md5(data::text) AS data_hash FROM datasource"
+)
+
+
+def vector_post_build(datasource: DataSourceVector, margin_supported: bool) -> None:
+    if not margin_supported and isinstance(
+        datasource.data_store, DataStoreVectorInternal
+    ):
+        datasource.margin = ""
+
+
+DATASOURCE_BUILDERS: Dict[
+    str, Tuple[Callable[[Dict[str, Any]], Optional[str]], Callable[..., DataSource]]
+] = {
+    DataType.vector: (validate_vector_data, DataSourceVector),
+    DataType.raster: (validate_raster_data, DataSourceRaster),
+}
+
+DATASOURCE_POST_BUILD_HOOKS: Dict[str, Callable[[DataSource, bool], None]] = {
+    DataType.vector: vector_post_build,
+}
+
+
+def construct_datasource(
+    identifier: str, data: Dict[str, Any], margin_supported: bool = True
+) -> DataSource:
+    data_type: str = data["type"]
+    builder = DATASOURCE_BUILDERS.get(data_type)
+    if builder is None:
+        raise Exception(f"Unsupported type of DataSource: {data_type}")
+
+    validate, constructor = builder
+    message: Optional[str] = validate(data)
+    if message is not None:
+        raise Exception(
+            f"Error load {data_type.capitalize()} DataSource '{identifier}' from DB: {message}"
+        )
+    try:
+        datasource: DataSource = constructor(data)
+    except Exception as e:
+        raise Exception(
+            f"Error load {data_type.capitalize()} DataSource '{identifier}' from DB: {str(e)}"
+        )
+
+    post_build = DATASOURCE_POST_BUILD_HOOKS.get(data_type)
+    if post_build is not None:
+        post_build(datasource, margin_supported)
+    return datasource
+
+
+def build_datasource(
+    identifier: str, data: Any, margin_supported: bool = True
+) -> Optional[DataSource]:
+    # Raw JSON can be str or bytes, orjson parses both without decoding
+    if not isinstance(data, dict):
+        data = orjson.loads(data)
+
+    try:
+        return construct_datasource(identifier, data, margin_supported)
+    except Exception as e:
+        logger.error(str(e))
+        return None
+
 
 async def load_datasources_from_db(
     app: FastAPI,
@@ -744,58 +871,57 @@ async def load_datasources_from_db(
         connection: Connection
         async with db_pool.acquire() as connection:
             datasources_from_db: List[Any] = await connection.fetch(
-                "SELECT * FROM datasource"
+                QUERY_SELECT_DATASOURCES
             )
     except Exception as e:
         message: str = (
             f"'load_datasources_from_db' error load DataSources from DB: {str(e)}"
         )
-        logging.error(message)
+        logger.error(message)
         raise Exception(message)
 
+    # New or changed DataSources are built in threads, parsing of layers is CPU-bound
+    # Unchanged DataSources are taken before await, concurrent reload may prune cache
+    changed: Dict[str, Any] = {}
+    unchanged: Dict[str, DataSource] = {}
     for ds in datasources_from_db:
-        identifier: str = ds["identifier"]
+        cached: Optional[Tuple[str, DataSource]] = _datasources_cache.get(
+            ds["identifier"]
+        )
+        if cached is None or cached[0] != ds["data_hash"]:
+            changed[ds["identifier"]] = ds["data"]
+        else:
+            unchanged[ds["identifier"]] = cached[1]
 
-        if isinstance(ds["data"], str):
-            data: Dict[str, Any] = orjson.loads(ds["data"])
-        elif isinstance(ds["data"], dict):
-            data = ds["data"]
-
-        if data["type"] == DataType.vector:
-            try:
-                ds_vector = DataSourceVector(data)
-            except Exception as e:
-                logger.error(
-                    f"Error load Vector DataSource '{identifier}' from DB: {str(e)}"
-                )
-                continue
+    margin_supported: bool = app.state.postgis_supports_margin
+    built: List[Optional[DataSource]] = await asyncio.gather(
+        *(
+            asyncio.to_thread(build_datasource, identifier, data, margin_supported)
+            for identifier, data in changed.items()
+        )
+    )
+    built_datasources: Dict[str, Optional[DataSource]] = dict(zip(changed, built))
+
+    for ds in datasources_from_db:
+        identifier: str = ds["identifier"]
 
-            if isinstance(ds_vector.data_store, DataStoreVectorInternal) and hasattr(
-                app.state, "postgis_version"
-            ):
-                # Check version PostGIS/GEOS
-                if (app.state.postgis_version[0] < 3) or (
-                    app.state.postgis_version[0] == 3
-                    and app.state.postgis_version[1] < 1
-                ):
-                    ds_vector.margin = ""
-            if isinstance(ds_vector.data_store, DataStoreVectorTiles):
-                app.state.datasource_keys[identifier] = ds_vector.data_store.keys
-
-            datasources[identifier] = ds_vector
-        elif data["type"] == DataType.raster:
-            try:
-                ds_raster = DataSourceRaster(data)
-            except Exception as e:
-                logger.error(
-                    f"Error load Raster DataSource '{identifier}' from DB: {str(e)}"
-                )
+        if identifier in built_datasources:
+            datasource: Optional[DataSource] = built_datasources[identifier]
+            if datasource is None:
                 continue
-            datasources[identifier] = ds_raster
+            _datasources_cache[identifier] = (ds["data_hash"], datasource)
         else:
-            logger.error(f'Unsupported type of DataSource: {data["type"]}')
-            continue
+            datasource = unchanged[identifier]
+            _datasources_cache[identifier] = (ds["data_hash"], datasource)
+
+        if isinstance(datasource.data_store, DataStoreVectorTiles):
+            app.state.datasource_keys[identifier] = datasource.data_store.keys
 
+        datasources[identifier] = datasource
         dss_not_exception[identifier] = ds
 
+    # Drop DataSources removed from DB or failed to load
+    for identifier in _datasources_cache.keys() - datasources.keys():
+        del _datasources_cache[identifier]
+
     return datasources, dss_not_exception
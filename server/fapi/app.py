@@ -1,4 +1,6 @@
 import os
+import orjson
+import warnings
 import reqsnaked
 import datetime
 import logging
@@ -6,18 +8,18 @@ import logging.config
 
 from pathlib import Path
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Dict, List, Any
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
 from concurrent_log_handler import ConcurrentTimedRotatingFileHandler as _
 
 from fastapi import FastAPI, Request, HTTPException, status
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import Response, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.encoders import jsonable_encoder
 from fastapi.staticfiles import StaticFiles
 from anyio import to_thread
 
 from server.fapi.tile import tiles_router
+from server.fapi.raster.tile import prefetch_tile_jobs
 from server.fapi.ds import ds_router
 from server.fapi.pyramid import pyramids_router
 
@@ -27,6 +29,7 @@ from server.fapi.utils import (
     load_config_app,
 )
 from server.datasources import load_datasources_from_db
+from server.tile_utils import TileJobCache, close_mbtiles_connections
 from server.fapi.db import connect_to_db, close_db_connection
 
 logging.config.fileConfig("log_app.ini", disable_existing_loggers=False)
@@ -35,6 +38,9 @@ logging.config.fileConfig("log_app.ini", disable_existing_loggers=False)
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     initialize_event_loop()
+    # ignore warnings from rio-tiler, rasterio
+    # filter is global for the worker, it is set once instead of on every tile
+    warnings.filterwarnings("ignore")
     app.state.env_vars = load_environments_from_file()
     to_thread.current_default_thread_limiter().total_tokens = int(
         app.state.env_vars.get("ANYIO_TOTAL_TOKENS")
@@ -46,23 +52,44 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # - postgis_version
     await connect_to_db(app)
 
-    app.state.global_dependencies: Dict[str, Any] = {}
+    # Cached tile jobs of single and mosaic datasets, keyed by dataset
+    app.state.global_dependencies: Dict[str, TileJobCache] = {}
+    app.state.mosaics_dependencies: Dict[str, TileJobCache] = {}
     app.state.datasource_keys: Dict[str, List[str]] = {}
     app.state.invalid_keys: Dict[str, datetime.datetime] = {}
     app.state.datasources, app.state.datasources_from_db = (
         await load_datasources_from_db(app)
     )
+    # Serialized list of DataSources and hashes of rows it was built from
+    app.state.datasources_json: bytes = b"[]"
+    app.state.datasources_json_version: Optional[Tuple[Tuple[str, str], ...]] = None
     app.state.http_client = reqsnaked.Client(user_agent="ISONE", store_cookie=True)
     app.state.root_path = str(Path(__file__).parents[2])
     load_config_app(app)
+    await prefetch_tile_jobs(app)
+
+    # Bodies of static endpoints are constant during lifetime of worker
+    app.state.health_bytes = orjson.dumps(
+        {
+            "worker_pid": os.getpid(),
+            "worker_type": "granian",
+            "worker_status": "running",
+        }
+    )
+    app.state.favicon_bytes = Path("static/favicon.ico").read_bytes()
 
     yield
 
+    await close_mbtiles_connections()
     if hasattr(app.state, "db_pool"):
         await close_db_connection(app)
 
 
-app = FastAPI(lifespan=lifespan, title="ISONE Tiler Server")
+app = FastAPI(
+    lifespan=lifespan,
+    title="ISONE Tiler Server",
+    default_response_class=ORJSONResponse,
+)
 
 prefix = "/api"
 app.include_router(pyramids_router, prefix=prefix)
@@ -82,7 +109,7 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 
 @app.exception_handler(status.HTTP_404_NOT_FOUND)
 def not_found_handler(request: Request, exc: HTTPException):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_404_NOT_FOUND,
         content={"message": "The resource you requested was not found."},
     )
@@ -91,40 +118,40 @@ def not_found_handler(request: Request, exc: HTTPException):
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(
     request: Request, exc: RequestValidationError
-) -> JSONResponse:
-    details = exc.errors()
-    modified_details = []
-    for error in details:
-        modified_details.append(
-            {
-                "location": error["loc"],
-                "message": error["msg"],
-                "type": error["type"],
-            }
-        )
-    return JSONResponse(
+) -> ORJSONResponse:
+    # Details contain only primitive values, orjson serializes them as is
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        content=jsonable_encoder({"detail": modified_details}),
+        content={
+            "detail": [
+                {
+                    "location": error["loc"],
+                    "message": error["msg"],
+                    "type": error["type"],
+                }
+                for error in exc.errors()
+            ]
+        },
     )
 
 
 @app.get(
     "/api/health",
     responses={200: {"content": {"application/json": {}}}},
-    response_class=JSONResponse,
+    response_class=ORJSONResponse,
 )
-async def health():
-    pid = os.getpid()
-    return JSONResponse(
+async def health(request: Request):
+    return Response(
+        content=request.app.state.health_bytes,
         status_code=status.HTTP_200_OK,
-        content={
-            "worker_pid": pid,
-            "worker_type": "granian",
-            "worker_status": "running",
-        },
+        media_type="application/json",
     )
 
 
 @app.get("/favicon.ico", include_in_schema=False)
-async def favicon():
-    return FileResponse("static/favicon.ico")
+async def favicon(request: Request):
+    return Response(
+        content=request.app.state.favicon_bytes,
+        media_type="image/x-icon",
+        headers={"Cache-Control": "public, max-age=86400"},
+    )
@@ -3,21 +3,51 @@ import orjson
 import logging
 import granian
 
-from typing import Tuple, Dict
+from functools import lru_cache
+
+from typing import Tuple, Dict, Any
 from asyncpg.pool import Pool
 from asyncpg import Connection
 from fastapi import FastAPI
+from pydantic import BaseModel
 from server.fapi.utils import load_environments_from_file
+from server.datasources import ORJSON_OPTIONS
 
 logger = logging.getLogger(__name__)
 
+DBPOOLMIN = 10
+# Connections of pool held by layers of one tile at the same time
+MVT_LAYER_CONCURRENCY = 4
+
+
+# Binary format of jsonb is the JSON text prefixed with version byte 1
+JSONB_VERSION = b"\x01"
+
+
+def orjson_default(obj: Any) -> Any:
+    # UUID, datetime and dataclasses are serialized by orjson natively
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(exclude_none=True)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def encode_jsonb(value: Any) -> bytes:
+    return JSONB_VERSION + orjson.dumps(
+        value, default=orjson_default, option=ORJSON_OPTIONS
+    )
+
+
+def decode_jsonb(data: bytes) -> Any:
+    return orjson.loads(memoryview(data)[1:])
+
 
 async def set_connection_type_codec(connection: Connection):
     await connection.set_type_codec(
         "jsonb",
-        encoder=lambda v: orjson.dumps(v).decode(),
-        decoder=orjson.loads,
+        encoder=encode_jsonb,
+        decoder=decode_jsonb,
         schema="pg_catalog",
+        format="binary",
     )
 
 
@@ -28,18 +58,34 @@ def dsn_postgresql() -> Tuple[str, int]:
     return dsn, db_pool_size
 
 
+def db_pool_min_size(db_pool_size: int) -> int:
+    # Connections opened at startup, bursts of requests don't wait for handshakes
+    config: Dict[str, str] = load_environments_from_file()
+    return min(int(config.get("DBPOOLMIN", DBPOOLMIN)), db_pool_size)
+
+
+@lru_cache(maxsize=1)
+def mvt_layer_concurrency() -> int:
+    config: Dict[str, str] = load_environments_from_file()
+    return max(1, int(config.get("MVT_LAYER_CONCURRENCY", MVT_LAYER_CONCURRENCY)))
+
+
 async def connect_to_db(app: FastAPI) -> None:
     dsn, db_pool_size = dsn_postgresql()
     app.state.db_pool: Pool = await asyncpg.create_pool(
         dsn=dsn,
         init=set_connection_type_codec,
-        min_size=1,
+        min_size=db_pool_min_size(db_pool_size),
+        # DBPOOLSIZE of all workers together must not exceed max_connections of PostgreSQL
         max_size=db_pool_size,
         max_queries=5000,
+        statement_cache_size=1024,
         max_inactive_connection_lifetime=300,
         timeout=180,  # 3 Minutes
         ssl=False,
     )
+    # Parameter 'margin' of ST_TileEnvelope is available since PostGIS 3.1
+    app.state.postgis_supports_margin: bool = True
     try:
         # check version PostGIS
         connection: Connection
@@ -51,13 +97,14 @@ async def connect_to_db(app: FastAPI) -> None:
             app.state.postgis_version: Tuple[int, int, int] = tuple(
                 map(int, versions[1].split("."))
             )
+            app.state.postgis_supports_margin = app.state.postgis_version >= (3, 1)
     except asyncpg.exceptions.UndefinedFunctionError as e:
         message: str = f"'connect_to_db': PostGIS probably not installed, {str(e)}"
-        logging.error(message)
+        logger.error(message)
         granian.server.logger.error(f"\n{message}\n")
     except Exception as e:
         message: str = f"'connect_to_db' error: {str(e)}"
-        logging.error(message)
+        logger.error(message)
         raise Exception(e)
 
 
@@ -1,24 +1,48 @@
 import os
+import asyncio
 import orjson
-import multiprocessing
 import logging
 import shutil
+import time
 
 from uuid import uuid4
-from typing import Dict, List, Any, Optional, Union, Literal, Tuple, Annotated
+from typing import (
+    Dict,
+    List,
+    Any,
+    Optional,
+    Union,
+    Literal,
+    Tuple,
+    Annotated,
+    Set,
+    FrozenSet,
+    Coroutine,
+)
 from urllib.parse import unquote
 
-from fastapi import APIRouter, Request, Body, HTTPException, status
-from fastapi.responses import JSONResponse, Response
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    FastAPI,
+    Request,
+    Body,
+    HTTPException,
+    status,
+)
+from fastapi.responses import ORJSONResponse, Response
 from asyncpg.pool import Pool
 from asyncpg import Connection, UniqueViolationError
 from pydantic_core import ErrorDetails
 from pydantic import (
     BaseModel,
     RootModel,
-    validator,
+    Field as PydanticField,
+    field_validator,
     model_validator,
+    ValidationInfo,
     BeforeValidator,
+    Discriminator,
     HttpUrl,
     TypeAdapter,
     ValidationError,
@@ -27,7 +51,9 @@ from pydantic import (
 
 from raster_tiles.defaults import PIXEL_SELECTION_METHOD
 from server.datasources import (
+    compile_where_clause,
     load_datasources_from_db,
+    construct_datasource,
     BUFFER,
     EXTENT,
     STORE_TYPE,
@@ -38,19 +64,15 @@ from server.datasources import (
     RESAMPLING,
     MINZOOM,
     MAXZOOM,
+    CPU_COUNT,
+    ORJSON_OPTIONS,
     EncodingType,
     StoreType,
     DataType,
-    DataSourceRaster,
-    DataSourceVector,
-    DataStoreVectorInternal,
     DataStoreVectorTiles,
     DataSource,
 )
 
-from vector_tiles.jfe.parser import parse_jfe
-from vector_tiles.jfe.evaluate import to_sql_where
-from vector_tiles.jfe.ast import Node
 
 logger = logging.getLogger(__name__)
 
@@ -59,7 +81,26 @@ Url = Annotated[
     str, BeforeValidator(lambda value: str(http_url_adapter.validate_python(value)))
 ]
 
-ds_router = APIRouter()
+ds_router = APIRouter(default_response_class=ORJSONResponse)
+
+TILE_DRIVERS = frozenset(("PNG",))
+
+# Columns in order of parameters of QUERY_INSERT_DATASOURCE
+DATASOURCE_COLUMNS: Tuple[str, ...] = (
+    "identifier",
+    "data_type",
+    "store_type",
+    "host",
+    "port",
+    "mbtiles",
+    "description",
+    "attribution",
+    "minzoom",
+    "maxzoom",
+    "bounds",
+    "center",
+    "data",
+)
 
 QUERY_INSERT_DATASOURCE: str = """
     INSERT INTO datasource(
@@ -97,83 +138,64 @@ QUERY_UPDATE_DATASOURCE: str = """
         data=$13
     WHERE
         identifier=$1
+    RETURNING identifier
 """
 
+QUERY_SELECT_DATASOURCE: str = "SELECT data FROM datasource WHERE identifier=$1"
 
-def query_exists_table(table: str, schema: str = "public") -> str:
-    query: str = (
-        f"\
-        SELECT EXISTS (\
-            SELECT FROM information_schema.tables \
-            WHERE  table_schema = '{schema}'\
-            AND    table_name   = '{table}'\
-        );"
-    )
-    return query
+# Text of jsonb is valid JSON and is returned to client as is, without decode/encode
+QUERY_SELECT_DATASOURCE_JSON: str = (
+    "SELECT data::text FROM datasource WHERE identifier=$1"
+)
 
+QUERY_DELETE_DATASOURCE: str = "DELETE FROM datasource WHERE identifier=$1"
+QUERY_DELETE_DATASOURCES: str = (
+    "DELETE FROM datasource WHERE identifier = ANY($1::text[])"
+)
 
-def query_exists_column(table: str, column: str) -> str:
-    query: str = (
-        f"\
-        SELECT EXISTS (\
-            SELECT column_name \
-            FROM information_schema.columns \
-            WHERE table_name='{table}' and column_name='{column}'\
-        );"
-    )
-    return query
+# Tables and columns of layers are checked with one query each
+QUERY_EXISTING_TABLES: str = """
+    SELECT coalesce(array_agg(table_name::text), '{}')
+    FROM information_schema.tables
+    WHERE table_schema = $1 AND table_name = ANY($2::text[])
+"""
+
+QUERY_EXISTING_COLUMNS: str = """
+    SELECT table_name::text, column_name::text
+    FROM information_schema.columns
+    WHERE table_name = ANY($1::text[])
+"""
+
+# Identifiers are aggregated in a single array value instead of a Record per row
+QUERY_SELECT_EXISTING_IDENTIFIERS: str = """
+    SELECT coalesce(array_agg(identifier), '{}')
+    FROM datasource
+    WHERE identifier = ANY($1::text[])
+"""
 
 
 def save_datasource_from_db_to_app_state(
     request: Request, ds_from_db: Dict[str, Any]
 ) -> DataSource:
+    # Same validation and construction as for DataSources loaded at startup
     identifier: str = ds_from_db["id"]
-    if ds_from_db["type"] == DataType.vector:
-        try:
-            ds_vector = DataSourceVector(ds_from_db)
-        except Exception as e:
-            message: str = (
-                f"'save_datasource_from_db_to_app_state': error load Vector DataSource '{identifier}' from DB: {str(e)}"
-            )
-            logger.error(message)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message
-            )
-
-        if isinstance(ds_vector.data_store, DataStoreVectorInternal) and hasattr(
-            request.app.state, "postgis_version"
-        ):
-            # Check version PostGIS/GEOS
-            if (request.app.state.postgis_version[0] < 3) or (
-                request.app.state.postgis_version[0] == 3
-                and request.app.state.postgis_version[1] < 1
-            ):
-                ds_vector.margin = ""
-        if isinstance(ds_vector.data_store, DataStoreVectorTiles):
-            request.app.state.datasource_keys[identifier] = ds_vector.data_store.keys
-
-        request.app.state.datasources[identifier] = ds_vector
-    elif ds_from_db["type"] == DataType.raster:
-        try:
-            ds_raster = DataSourceRaster(ds_from_db)
-        except Exception as e:
-            message: str = (
-                f"Error load Raster DataSource '{identifier}' from DB: {str(e)}"
-            )
-            logger.error(message)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message
-            )
-        request.app.state.datasources[identifier] = ds_raster
-    else:
-        message: str = f'Unsupported type of DataSource: {ds_from_db["type"]}'
+    try:
+        datasource: DataSource = construct_datasource(
+            identifier, ds_from_db, request.app.state.postgis_supports_margin
+        )
+    except Exception as e:
+        message: str = f"'save_datasource_from_db_to_app_state': {str(e)}"
         logger.error(message)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message
         )
 
+    if isinstance(datasource.data_store, DataStoreVectorTiles):
+        request.app.state.datasource_keys[identifier] = datasource.data_store.keys
+
+    request.app.state.datasources[identifier] = datasource
     request.app.state.datasources_from_db[identifier] = ds_from_db
-    return request.app.state.datasources[identifier]
+    return datasource
 
 
 async def load_datasource_from_db(
@@ -183,8 +205,9 @@ async def load_datasource_from_db(
     try:
         connection: Connection
         async with db_pool.acquire() as connection:
-            datasource = await connection.fetchrow(
-                f"SELECT data FROM datasource WHERE identifier='{datasource_id}'"
+            # jsonb codec returns decoded data, it's not copied
+            data: Optional[Dict[str, Any]] = await connection.fetchval(
+                QUERY_SELECT_DATASOURCE, datasource_id
             )
     except Exception as e:
         message: str = (
@@ -195,43 +218,80 @@ async def load_datasource_from_db(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message
         )
 
-    if datasource is not None:
-        return dict(datasource["data"])
+    return data
+
+
+async def load_datasource_json_from_db(
+    db_pool: Pool,
+    datasource_id: str,
+) -> Optional[str]:
+    try:
+        connection: Connection
+        async with db_pool.acquire() as connection:
+            data: Optional[str] = await connection.fetchval(
+                QUERY_SELECT_DATASOURCE_JSON, datasource_id
+            )
+    except Exception as e:
+        message: str = (
+            f"'load_datasource_json_from_db' error load DataSource '{datasource_id}' from DB: {str(e)}"
+        )
+        logger.error(message)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message
+        )
+
+    return data
+
 
-    return None
+# Identifier is inserted already escaped as content of JSON string
+DATASOURCE_NOT_FOUND: bytes = b'{"message":"DataSource id \'%s\' not found in DB"}'
 
 
 @ds_router.get(
     "/datasources/{datasource_id}",
     responses={200: {"content": {"application/json": {}}}},
-    response_class=JSONResponse,
+    response_class=Response,
 )
 async def get_datasource(
     request: Request,
     datasource_id: str,
-) -> JSONResponse:
+) -> Response:
     db_pool: Pool = request.app.state.db_pool
-    datasource: Optional[Dict[str, Any]] = await load_datasource_from_db(
+    datasource: Optional[str] = await load_datasource_json_from_db(
         db_pool, datasource_id
     )
 
     if datasource is None:
-        content: Dict[str, Any] = {
-            "message": f"DataSource id '{datasource_id}' not found in DB"
-        }
-        return JSONResponse(content=content)
+        content: bytes = DATASOURCE_NOT_FOUND % orjson.dumps(datasource_id)[1:-1]
+        return Response(content=content, media_type="application/json")
+
+    return Response(content=datasource.encode(), media_type="application/json")
 
-    return JSONResponse(content=datasource)
+
+def datasources_to_json(app: FastAPI) -> bytes:
+    # Listing is serialized again only when some DataSource row in DB changed
+    datasources_from_db: Dict[str, Any] = app.state.datasources_from_db
+    version: Tuple[Tuple[str, str], ...] = tuple(
+        (identifier, datasource["data_hash"])
+        for identifier, datasource in datasources_from_db.items()
+    )
+    if version != app.state.datasources_json_version:
+        app.state.datasources_json = orjson.dumps(
+            [datasource["data"] for datasource in datasources_from_db.values()],
+            option=ORJSON_OPTIONS,
+        )
+        app.state.datasources_json_version = version
+    return app.state.datasources_json
 
 
 @ds_router.get(
     "/datasources",
     responses={200: {"content": {"application/json": {}}}},
-    response_class=JSONResponse,
+    response_class=Response,
 )
 async def get_datasources(
     request: Request,
-) -> JSONResponse:
+) -> Response:
     try:
         request.app.state.datasources, request.app.state.datasources_from_db = (
             await load_datasources_from_db(request.app)
@@ -241,11 +301,9 @@ async def get_datasources(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
         )
 
-    ds_list: List[Dict[str, Any]] = [
-        dict(datasource["data"])
-        for datasource in request.app.state.datasources_from_db.values()
-    ]
-    return JSONResponse(content=ds_list)
+    return Response(
+        content=datasources_to_json(request.app), media_type="application/json"
+    )
 
 
 # ====================================================================
@@ -256,7 +314,7 @@ async def get_datasources(
 class Center(RootModel):
     root: List[Union[float, int]]
 
-    @validator("root")
+    @field_validator("root")
     def validate_root(cls, value: List[Union[float, int]]):
         if len(value) < 2 or len(value) > 3:
             raise ValueError(
@@ -312,6 +370,17 @@ class Bounds(BaseModel):
 # ====================================================================
 
 
+# Bounds of zoom are checked by pydantic-core while the field is parsed
+ZoomLevel = Annotated[int, PydanticField(ge=MINZOOM, le=MAXZOOM)]
+
+
+def validate_zoom_range(model: str, minzoom: int, maxzoom: int) -> None:
+    if minzoom > maxzoom:
+        raise ValueError(
+            f"{model}.minzoom must be in range [{MINZOOM}-{MAXZOOM}] and less than maxzoom. Got {minzoom}"
+        )
+
+
 class DataStoreRasterBase(BaseModel):
     type: str
     store: str
@@ -321,7 +390,7 @@ class DataStoreRasterBase(BaseModel):
     file: Optional[str] = None
     folder: Optional[str] = None
 
-    @validator("type")
+    @field_validator("type")
     def validate_type(cls, value):
         if value != RASTER:
             raise ValueError(
@@ -329,21 +398,21 @@ class DataStoreRasterBase(BaseModel):
             )
         return value
 
-    @validator("store")
+    @field_validator("store")
     def validate_store(cls, value):
         if value not in STORE_TYPE:
             raise ValueError(
-                f"DataStoreRasterBase.store must have one of the values {STORE_TYPE}"
+                f"DataStoreRasterBase.store must have one of the values {sorted(STORE_TYPE)}"
             )
         return value
 
-    @validator("file")
+    @field_validator("file")
     def validate_file(cls, value):
         if value is not None:
             filename, ext = os.path.splitext(value)
             if ext not in EXTENSIONS:
                 raise ValueError(
-                    f"DataStoreRasterBase.file must have one of the values {EXTENSIONS}"
+                    f"DataStoreRasterBase.file must have one of the values {sorted(EXTENSIONS)}"
                 )
         return value
 
@@ -369,7 +438,7 @@ class PyramidSettings(BaseModel):
     tiledriver: Optional[str] = "PNG"
     tile_size: Optional[int] = 256
     xyz: Optional[bool] = True
-    count_processes: Optional[int] = multiprocessing.cpu_count()
+    count_processes: Optional[int] = CPU_COUNT
     minzoom: int
     maxzoom: int
     mbtiles: Optional[bool] = True
@@ -384,78 +453,48 @@ class PyramidSettings(BaseModel):
     pixel_selection_method: Optional[str] = "FirstMethod"
     merge: Optional[bool] = True
 
-    @validator("resampling")
-    def validate_resampling(cls, value):
-        if value not in RESAMPLING:
+    @model_validator(mode="after")
+    def validate_fields(self):
+        if self.resampling not in RESAMPLING:
             raise ValueError(
-                f"PyramidSettings.resampling must have one of the values {RESAMPLING}"
+                f"PyramidSettings.resampling must have one of the values {sorted(RESAMPLING)}"
             )
-        return value
-
-    @validator("resampling_warp")
-    def validate_resampling_warp(cls, value):
-        if value not in RESAMPLING:
+        if self.resampling_warp not in RESAMPLING:
             raise ValueError(
-                f"PyramidSettings.resampling must have one of the values {RESAMPLING}"
+                f"PyramidSettings.resampling must have one of the values {sorted(RESAMPLING)}"
             )
-        return value
-
-    @validator("tiledriver")
-    def validate_tiledriver(cls, value):
-        if value not in ["PNG"]:
+        if self.tiledriver not in TILE_DRIVERS:
             raise ValueError(
                 f"PyramidSettings.tiledriver must have one of the values ['PNG']"
             )
-        return value
-
-    @validator("tile_size")
-    def validate_tile_size(cls, value):
-        if value > 512 or value < 128:
+        if self.tile_size > 512 or self.tile_size < 128:
             raise ValueError(
                 f"PyramidSettings.tile_size must have one of the values [128, 256, 512]"
             )
-        return value
-
-    @validator("count_processes")
-    def validate_count_processes(cls, value):
-        cpus = multiprocessing.cpu_count()
-        if value > cpus or value < 1:
+        if self.count_processes > CPU_COUNT or self.count_processes < 1:
             raise ValueError(
-                f"PyramidSettings.count_processes must be in range 1...{cpus}, got '{value}'"
+                f"PyramidSettings.count_processes must be in range 1...{CPU_COUNT}, got '{self.count_processes}'"
             )
-        return value
-
-    @validator("minzoom")
-    def validate_minzoom(cls, value):
-        if not isinstance(value, int):
+        if self.minzoom < MINZOOM or self.minzoom > MAXZOOM:
             raise ValueError(
-                f"PyramidSettings.minzoom: must be integer. Got: '{type(value)}'"
+                f"PyramidSettings.minzoom: value must be in range 0...20, got '{self.minzoom}'"
             )
-        if value < MINZOOM or value > MAXZOOM:
+        if self.maxzoom < MINZOOM or self.maxzoom > MAXZOOM:
             raise ValueError(
-                f"PyramidSettings.minzoom: value must be in range 0...20, got '{value}'"
+                f"PyramidSettings.maxzoom: value must be in range 0...20, got '{self.maxzoom}'"
             )
-        return value
-
-    @validator("maxzoom")
-    def validate_maxzoom(cls, value):
-        if not isinstance(value, int):
-            raise ValueError(
-                f"PyramidSettings.maxzoom: must be integer. Got: '{type(value)}'"
-            )
-        if value < MINZOOM or value > MAXZOOM:
-            raise ValueError(
-                f"PyramidSettings.maxzoom: value must be in range 0...20, got '{value}'"
-            )
-        return value
-
-    @validator("pixel_selection_method")
-    def validate_pixel_selection_method(cls, value):
-        if value not in PIXEL_SELECTION_METHOD:
+        if self.pixel_selection_method not in PIXEL_SELECTION_METHOD:
             raise ValueError(
                 f"PyramidSettings.pixel_selection_method must have one of the values ['FirstMethod', 'HighestMethod', 'LowestMethod', 'MeanMethod']"
             )
-        return value
+        return self
+
+
+# Pyramid of vector DataSource uses only zooms and number of processes
+PYRAMID_SETTINGS_VECTOR_EXCLUDE: Dict[str, Set[str]] = {
+    "pyramidSettings": set(PyramidSettings.model_fields)
+    - {"minzoom", "maxzoom", "count_processes"}
+}
 
 
 class DataSourceRasterBase(BaseModel):
@@ -467,8 +506,8 @@ class DataSourceRasterBase(BaseModel):
     attribution: Optional[str] = None
     description: Optional[str] = None
     version: Optional[str] = None
-    minzoom: int
-    maxzoom: int
+    minzoom: ZoomLevel
+    maxzoom: ZoomLevel
     mbtiles: Optional[bool] = True
     center: Optional[Center] = None
     bounds: Optional[Bounds] = None
@@ -476,9 +515,9 @@ class DataSourceRasterBase(BaseModel):
     use_cache_only: Optional[bool] = False
     compress_tiles: Optional[bool] = False
 
-    @validator("dataStore")
-    def validate_type(cls, value: DataStoreRasterBase, values):
-        if values["mosaics"]:
+    @field_validator("dataStore")
+    def validate_type(cls, value: DataStoreRasterBase, info: ValidationInfo):
+        if info.data.get("mosaics"):
             if value.folder is None:
                 raise ValueError(
                     f"DataSourceRasterBase.dataStore.folder for Mosaic shouldn't be None"
@@ -492,22 +531,7 @@ class DataSourceRasterBase(BaseModel):
 
     @model_validator(mode="after")
     def validate_fields(self):
-        if (
-            self.minzoom < MINZOOM
-            or self.minzoom > MAXZOOM
-            or self.minzoom > self.maxzoom
-        ):
-            raise ValueError(
-                f"DataSourceRasterBase.minzoom must be in range [0-20] and less than maxzoom. Got {self.minzoom}"
-            )
-        if (
-            self.maxzoom < MINZOOM
-            or self.maxzoom > MAXZOOM
-            or self.maxzoom < self.minzoom
-        ):
-            raise ValueError(
-                f"DataSourceRasterBase.maxzoom must be in range [0-20] and more than minzoom. Got {self.maxzoom}"
-            )
+        validate_zoom_range("DataSourceRasterBase", self.minzoom, self.maxzoom)
         if self.bounds is not None and self.center is not None:
             center_lng: float = self.center.root[0]
             center_lat: float = self.center.root[1]
@@ -557,7 +581,7 @@ class DataStoreVectorBase(BaseModel):
     tiles: Optional[List[Url]] = None
     keys: Optional[List[str]] = None
 
-    @validator("type")
+    @field_validator("type")
     def validate_type(cls, value):
         if value != VECTOR:
             raise ValueError(
@@ -565,11 +589,11 @@ class DataStoreVectorBase(BaseModel):
             )
         return value
 
-    @validator("store")
+    @field_validator("store")
     def validate_store(cls, value):
         if value not in STORE_TYPE:
             raise ValueError(
-                f"DataStoreVectorBase.store must have one of the values {STORE_TYPE}"
+                f"DataStoreVectorBase.store must have one of the values {sorted(STORE_TYPE)}"
             )
         return value
 
@@ -583,28 +607,14 @@ class DataStoreVectorBase(BaseModel):
 
 
 class LayerQuerySQL(BaseModel):
-    minzoom: int
-    maxzoom: int
+    minzoom: ZoomLevel
+    maxzoom: ZoomLevel
     sql: str
 
     @model_validator(mode="after")
     def validate_fields(self):
-        if (
-            self.minzoom < MINZOOM
-            or self.minzoom > MAXZOOM
-            or self.minzoom > self.maxzoom
-        ):
-            raise ValueError(
-                f"LayerQuerySQL.minzoom must be in range [{MINZOOM}-{MAXZOOM}] and less than maxzoom. Got {self.minzoom}"
-            )
-        if (
-            self.maxzoom < MINZOOM
-            or self.maxzoom > MAXZOOM
-            or self.maxzoom < self.minzoom
-        ):
-            raise ValueError(
-                f"LayerQuerySQL.maxzoom must be in range [{MINZOOM}-{MAXZOOM}] and more than minzoom. Got {self.maxzoom}"
-            )
+        validate_zoom_range("LayerQuerySQL", self.minzoom, self.maxzoom)
+        return self
 
 
 class Field(BaseModel):
@@ -624,18 +634,18 @@ class VectorLayer(BaseModel):
     storeLayer: Optional[str] = None
     geomField: Optional[str] = None
     description: Optional[str] = None
-    minzoom: int
-    maxzoom: int
+    minzoom: ZoomLevel
+    maxzoom: ZoomLevel
     simplify: Optional[bool] = False
     filter: Optional[List[Any]] = None
     fields: Optional[List[Field]] = None
     queries: Optional[List[LayerQuerySQL]] = None
 
-    @validator("type")
+    @field_validator("type")
     def validate_type(cls, value):
         if value not in LAYER_TYPE:
             raise ValueError(
-                f"VectorLayer.type must have one of the values {LAYER_TYPE}"
+                f"VectorLayer.type must have one of the values {sorted(LAYER_TYPE)}"
             )
         return value
 
@@ -645,31 +655,18 @@ class VectorLayer(BaseModel):
             raise ValueError(
                 f"VectorLayer.[filter, queries] cannot be defined simultaneously"
             )
-        if (
-            self.minzoom < MINZOOM
-            or self.minzoom > MAXZOOM
-            or self.minzoom > self.maxzoom
-        ):
-            raise ValueError(
-                f"VectorLayer.minzoom must be in range [{MINZOOM}-{MAXZOOM}] and less than maxzoom. Got {self.minzoom}"
-            )
-        if (
-            self.maxzoom < MINZOOM
-            or self.maxzoom > MAXZOOM
-            or self.maxzoom < self.minzoom
-        ):
-            raise ValueError(
-                f"VectorLayer.maxzoom must be in range [{MINZOOM}-{MAXZOOM}] and more than minzoom. Got {self.maxzoom}"
-            )
+        validate_zoom_range("VectorLayer", self.minzoom, self.maxzoom)
 
         # validate filter and fields
         if self.fields is not None and self.filter is not None:
-            field_mapping: Dict[str, str] = {
-                field.name: field.name_in_db for field in self.fields
-            }
+            field_mapping: Tuple[Tuple[str, str], ...] = tuple(
+                (field.name, field.name_in_db) for field in self.fields
+            )
             try:
-                parsed_jfe: Node = parse_jfe(self.filter, self.geomField)
-                where_clause: str = to_sql_where(parsed_jfe, field_mapping)
+                # Shares the cache with the DataSources built from DB
+                compile_where_clause(
+                    orjson.dumps(self.filter).decode(), self.geomField, field_mapping
+                )
             except Exception as e:
                 raise ValueError(
                     f"VectorLayer.[filter, fields] must be synchronized according to the list of fields used: {str(e)}"
@@ -686,8 +683,8 @@ class DataSourceVectorBase(BaseModel):
     version: Optional[str] = None
     buffer: Optional[int] = BUFFER
     extent: Optional[int] = EXTENT
-    minzoom: int
-    maxzoom: int
+    minzoom: ZoomLevel
+    maxzoom: ZoomLevel
     mbtiles: Optional[bool] = True
     pyramidSettings: Optional[PyramidSettings] = None
     center: Optional[Center] = None
@@ -696,7 +693,7 @@ class DataSourceVectorBase(BaseModel):
     use_cache_only: Optional[bool] = False
     compress_tiles: Optional[bool] = False
 
-    @validator("type")
+    @field_validator("type")
     def validate_type(cls, value):
         if value != VECTOR:
             raise ValueError(
@@ -706,23 +703,7 @@ class DataSourceVectorBase(BaseModel):
 
     @model_validator(mode="after")
     def validate_fields(self):
-        if (
-            self.minzoom < MINZOOM
-            or self.minzoom > MAXZOOM
-            or self.minzoom > self.maxzoom
-        ):
-            raise ValueError(
-                f"DataSourceVectorBase.minzoom must be in range [0-20] and less than maxzoom. Got {self.minzoom}"
-            )
-
-        if (
-            self.maxzoom < MINZOOM
-            or self.maxzoom > MAXZOOM
-            or self.maxzoom < self.minzoom
-        ):
-            raise ValueError(
-                f"DataSourceVectorBase.maxzoom must be in range [0-20] and more than minzoom. Got {self.maxzoom}"
-            )
+        validate_zoom_range("DataSourceVectorBase", self.minzoom, self.maxzoom)
         if self.dataStore.store == StoreType.internal and self.layers is None:
             raise ValueError(
                 f"DataSourceVectorBase.layers must be defined for store type 'internal'"
@@ -771,10 +752,21 @@ class DataSourceVectorBase(BaseModel):
             self.id = str(uuid4())
 
 
+# Validator of both DataSource types, the model is selected by "type" in pydantic-core
+datasource_adapter = TypeAdapter(
+    Annotated[Union[DataSourceVectorBase, DataSourceRasterBase], Discriminator("type")]
+)
+
+
 async def save_datasource_to_db(
     request: Request,
     ds: Dict[str, Any],
+    connection: Optional[Connection] = None,
 ) -> Response:
+    if connection is None:
+        db_pool: Pool = request.app.state.db_pool
+        async with db_pool.acquire() as connection:
+            return await save_datasource_to_db(request, ds, connection)
 
     identifier = ds.get("id")
     data_type: str = ds.get("type")
@@ -790,15 +782,6 @@ async def save_datasource_to_db(
     center: Optional[List[float]] = ds.get("center")
     mbtiles: bool = ds.get("mbtiles")
 
-    pyr_settings: Dict[str, Any] = ds.get("pyramidSettings")
-    if pyr_settings is not None and data_type == DataType.vector:
-        ps_vector: Dict[str, Any] = {
-            key: pyr_settings[key]
-            for key in pyr_settings
-            if key in ["minzoom", "maxzoom", "count_processes"]
-        }
-        ds["pyramidSettings"] = ps_vector
-
     params = (
         identifier,
         data_type,
@@ -831,41 +814,37 @@ async def save_datasource_to_db(
         )
 
     try:
-        db_pool: Pool = request.app.state.db_pool
-        connection: Connection
-        async with db_pool.acquire() as connection:
-            try:
-                if update:
-                    record = await connection.fetchval(
-                        f"SELECT EXISTS(SELECT 1 FROM datasource WHERE identifier='{identifier}')"
+        try:
+            if update:
+                # Existence check and update in one round trip
+                record = await connection.fetchval(
+                    query,
+                    *params,
+                )
+                if record is None:
+                    return Response(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        content=orjson.dumps(
+                            {
+                                "message": f"'save_datasource_to_db' error update DataSource: '{identifier}' not exists"
+                            }
+                        ),
                     )
-                    if record:
-                        await connection.execute(
-                            query,
-                            *params,
-                        )
-                    else:
-                        return Response(
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            content=orjson.dumps(
-                                {
-                                    "message": f"'save_datasource_to_db' error update DataSource: '{identifier}' not exists"
-                                }
-                            ),
-                        )
-                else:
+            else:
+                # Savepoint keeps the transaction of caller usable after UniqueViolationError
+                async with connection.transaction():
                     await connection.execute(
                         query,
                         *params,
                     )
-            except UniqueViolationError:
-                new_id: str = str(uuid4())
-                ds["id"] = new_id
-                new_params = (new_id,) + params[1:]
-                await connection.execute(
-                    query,
-                    *new_params,
-                )
+        except UniqueViolationError:
+            new_id: str = str(uuid4())
+            ds["id"] = new_id
+            new_params = (new_id,) + params[1:]
+            await connection.execute(
+                query,
+                *new_params,
+            )
 
     except Exception as e:
         ds_id: str = ds.get("id")
@@ -889,6 +868,43 @@ async def save_datasource_to_db(
     )
 
 
+INFORMATION_SCHEMA_TTL: float = 60.0
+# DataSource files validated at the same time, each holds a connection of the pool
+UPLOAD_CONCURRENCY: int = 8
+
+# Table name -> (expiration time, table exists in 'public' schema, columns of table)
+_tables_info_cache: Dict[str, Tuple[float, bool, FrozenSet[str]]] = {}
+
+
+async def load_tables_info(
+    connection: Connection, tables: List[str]
+) -> Dict[str, Tuple[bool, FrozenSet[str]]]:
+    # Tables of layers rarely change, information_schema is queried for stale ones only
+    now: float = time.monotonic()
+    stale: List[str] = [
+        table
+        for table in set(tables)
+        if table not in _tables_info_cache or _tables_info_cache[table][0] <= now
+    ]
+    if len(stale) > 0:
+        existing_tables: Set[str] = set(
+            await connection.fetchval(QUERY_EXISTING_TABLES, "public", stale)
+        )
+        columns: Dict[str, Set[str]] = {table: set() for table in stale}
+        for record in await connection.fetch(QUERY_EXISTING_COLUMNS, stale):
+            columns[record[0]].add(record[1])
+
+        expires: float = now + INFORMATION_SCHEMA_TTL
+        for table in stale:
+            _tables_info_cache[table] = (
+                expires,
+                table in existing_tables,
+                frozenset(columns[table]),
+            )
+
+    return {table: _tables_info_cache[table][1:] for table in tables}
+
+
 async def validate_vector_layers(
     datasource: DataSourceVectorBase, connection: Connection
 ) -> Optional[List[ErrorDetails]]:
@@ -896,14 +912,22 @@ async def validate_vector_layers(
     layers: Optional[List[VectorLayer]] = datasource.layers
 
     if layers is not None:
+        tables: List[str] = [
+            layer.storeLayer
+            for layer in layers
+            if layer.queries is None and layer.storeLayer is not None
+        ]
+        tables_info: Dict[str, Tuple[bool, FrozenSet[str]]] = await load_tables_info(
+            connection, tables
+        )
+
         for layer in layers:
             # skip validation if SQL used
             if layer.queries is not None:
                 continue
 
             table: str = layer.storeLayer
-            is_table_exists: bool = await connection.fetchval(query_exists_table(table))
-            if not is_table_exists:
+            if table not in tables_info or not tables_info[table][0]:
                 if validation_errors is None:
                     validation_errors = []
                 validation_errors.append(
@@ -919,10 +943,8 @@ async def validate_vector_layers(
                 continue
 
             # validate geomFiled of layer
-            is_geo_column_exists: bool = await connection.fetchval(
-                query_exists_column(table, layer.geomField)
-            )
-            if not is_geo_column_exists:
+            table_columns: FrozenSet[str] = tables_info[table][1]
+            if layer.geomField not in table_columns:
                 if validation_errors is None:
                     validation_errors = []
                 validation_errors.append(
@@ -946,10 +968,7 @@ async def validate_vector_layers(
             if fields is not None:
                 for field in fields:
                     column: str = field.name_in_db
-                    is_column_exists: bool = await connection.fetchval(
-                        query_exists_column(table, column)
-                    )
-                    if not is_column_exists:
+                    if column not in table_columns:
                         if validation_errors is None:
                             validation_errors = []
                         validation_errors.append(
@@ -988,28 +1007,46 @@ async def save_datasource(
     ),
 ) -> Response:
     if datasource.dataStore.store == StoreType.tiles:
-        for i in range(0, len(datasource.dataStore.tiles)):
-            datasource.dataStore.tiles[i] = unquote(datasource.dataStore.tiles[i])
+        # HttpUrl percent-encodes placeholders of template like '{z}'
+        datasource.dataStore.tiles = [
+            unquote(url) if "%" in url else url for url in datasource.dataStore.tiles
+        ]
 
-    if isinstance(datasource, DataSourceVectorBase):
-        try:
-            db_pool: Pool = request.app.state.db_pool
-            connection: Connection
-            async with db_pool.acquire() as connection:
-                validation_errors = await validate_vector_layers(datasource, connection)
-        except Exception as e:
-            message: str = f"'save_datasource' error validate vector layers: {str(e)}"
-            logger.error(message)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message
-            )
+    db_pool: Pool = request.app.state.db_pool
+    connection: Connection
+    async with db_pool.acquire() as connection:
+        # Layers are validated against the same state of DB the DataSource is saved to
+        async with connection.transaction():
+            if isinstance(datasource, DataSourceVectorBase):
+                try:
+                    validation_errors = await validate_vector_layers(
+                        datasource, connection
+                    )
+                except Exception as e:
+                    message: str = (
+                        f"'save_datasource' error validate vector layers: {str(e)}"
+                    )
+                    logger.error(message)
+                    raise HTTPException(
+                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        detail=message,
+                    )
 
-        if validation_errors is not None:
-            content: bytes = orjson.dumps(validation_errors)
-            return Response(content=content, status_code=status.HTTP_400_BAD_REQUEST)
+                if validation_errors is not None:
+                    content: bytes = orjson.dumps(
+                        validation_errors, option=ORJSON_OPTIONS
+                    )
+                    return Response(
+                        content=content, status_code=status.HTTP_400_BAD_REQUEST
+                    )
 
-    ds: Dict[str, Any] = datasource.model_dump(exclude_none=True)
-    response = await save_datasource_to_db(request, ds)
+            exclude: Optional[Dict[str, Set[str]]] = None
+            if isinstance(datasource, DataSourceVectorBase):
+                exclude = PYRAMID_SETTINGS_VECTOR_EXCLUDE
+            ds: Dict[str, Any] = datasource.model_dump(
+                exclude_none=True, exclude=exclude
+            )
+            response = await save_datasource_to_db(request, ds, connection)
 
     # Reload DataSources from DB
     try:
@@ -1024,18 +1061,188 @@ async def save_datasource(
     return response
 
 
+async def insert_datasources(
+    connection: Connection,
+    records: List[Tuple[Any, ...]],
+    delete_identifiers: Set[str],
+    validation_errors: List[ErrorDetails],
+) -> int:
+    # Rows of reloaded DataSources are replaced in the transaction of insert,
+    # failed insert keeps the old row
+    try:
+        async with connection.transaction():
+            if len(delete_identifiers) > 0:
+                await connection.execute(
+                    QUERY_DELETE_DATASOURCES, list(delete_identifiers)
+                )
+            await connection.copy_records_to_table(
+                "datasource", records=records, columns=DATASOURCE_COLUMNS
+            )
+        return len(records)
+    except Exception as e:
+        logger.warning(f"'insert_datasources' error COPY DataSources in DB: {str(e)}")
+
+    # COPY is all or nothing, insert one by one to find failed DataSources
+    count: int = 0
+    for params in records:
+        identifier: str = params[0]
+        try:
+            async with connection.transaction():
+                if identifier in delete_identifiers:
+                    await connection.execute(QUERY_DELETE_DATASOURCE, identifier)
+                await connection.execute(QUERY_INSERT_DATASOURCE, *params)
+            count += 1
+        except Exception as e:
+            validation_errors.append(
+                ErrorDetails(
+                    type="Database",
+                    loc=("insert_datasource",),
+                    input=f"{identifier}",
+                    msg=f"Error insert DataSource in DB: {e}",
+                    ctx={"datasource_id": f"{identifier}"},
+                )
+            )
+    return count
+
+
+def read_datasource_file(file: str) -> Optional[Dict[str, Any]]:
+    with open(file, "rb") as f:
+        return orjson.loads(f.read())
+
+
+async def upload_datasource(
+    db_pool: Pool,
+    semaphore: asyncio.Semaphore,
+    ds: Dict[str, Any],
+    identifier: str,
+) -> Tuple[Optional[Tuple[Any, ...]], List[ErrorDetails]]:
+    validation_errors: List[ErrorDetails] = []
+    connection: Connection
+    async with semaphore, db_pool.acquire() as connection:
+        data_type: str = ds.get("type")
+
+        if data_type != DataType.raster and data_type != DataType.vector:
+            validation_errors.append(
+                ErrorDetails(
+                    type="invalid",
+                    loc=("type",),
+                    msg=f"Invalid type of DataSource, must be 'raster' or 'vector'",
+                    input=f"{data_type}",
+                    ctx={"datasource_id": f"{identifier}"},
+                )
+            )
+            return None, validation_errors
+
+        try:
+            # Validation DataSources
+            pds: Union[DataSourceVectorBase, DataSourceRasterBase] = (
+                datasource_adapter.validate_python(ds)
+            )
+            if isinstance(pds, DataSourceVectorBase):
+                # Validate vector layers
+                validation_vl_errors = await validate_vector_layers(pds, connection)
+                if validation_vl_errors is not None:
+                    validation_errors.extend(validation_vl_errors)
+                    return None, validation_errors
+
+        # ValidationError - General Exception describing all validation errors
+        except ValidationError as e:
+            errors: List[ErrorDetails] = [
+                ErrorDetails(
+                    type=err.get("type"),
+                    loc=err.get("loc"),
+                    msg=err.get("msg"),
+                    input=err.get("input"),
+                    ctx={"datasource_id": f"{identifier}"},
+                )
+                for err in e.errors()
+            ]
+            validation_errors.extend(errors)
+            return None, validation_errors
+        except Exception as e:
+            logger.error(f"Error validate DataSource {identifier}: {e}")
+            validation_errors.append(
+                ErrorDetails(
+                    type="internal",
+                    loc=("model_validate",),
+                    msg=f"Error validate DataSource '{identifier}': {e}",
+                    input=f"{identifier}",
+                    ctx={"datasource_id": f"{identifier}"},
+                )
+            )
+            return None, validation_errors
+
+        data_store_dict: Dict[str, Any] = ds.get("dataStore")
+        if isinstance(pds, DataSourceRasterBase):
+            data_store_dict["dataset"] = pds.dataStore.dataset
+            ds["dataStore"] = data_store_dict
+
+        store_type: str = data_store_dict.get("store")
+        host: str = data_store_dict.get("host")
+        port: int = data_store_dict.get("port")
+        description: Optional[str] = ds.get("description")
+        attribution: Optional[str] = ds.get("attribution")
+        minzoom: int = ds.get("minzoom") or MINZOOM
+        maxzoom: int = ds.get("maxzoom") or MAXZOOM
+        bounds: Dict[str, float] = ds.get("bounds")
+        center: List[float] = ds.get("center")
+        mbtiles: bool = ds.get("mbtiles") or False
+
+        params = (
+            identifier,
+            data_type,
+            store_type,
+            host,
+            port,
+            mbtiles,
+            description,
+            attribution,
+            minzoom,
+            maxzoom,
+            bounds,
+            center,
+            ds,
+        )
+
+        return params, validation_errors
+
+
 async def upload_datasources_to_db(
-    ds_path: str, connection: Connection, datasource_ids: Optional[List[str]] = None
+    ds_path: str, db_pool: Pool, datasource_ids: Optional[List[str]] = None
 ) -> Tuple[int, List[ErrorDetails]]:
     validation_errors: List[ErrorDetails] = []
+    records: List[Tuple[Any, ...]] = []
     count: int = 0
 
-    for ds_file in os.listdir(ds_path):
-        file = os.path.join(ds_path, ds_file)
-        ds: Optional[Dict[str, Any]] = None
-        with open(file, "rb") as f:
-            ds = orjson.loads(f.read())
+    if not os.path.isdir(ds_path):
+        return count, validation_errors
+
+    # Files are read and parsed in threads, the event loop keeps serving requests
+    datasources_from_files: List[Optional[Dict[str, Any]]] = await asyncio.gather(
+        *(
+            asyncio.to_thread(read_datasource_file, os.path.join(ds_path, ds_file))
+            for ds_file in os.listdir(ds_path)
+        )
+    )
+
+    # DataSources already present in DB are found with one query for all files
+    identifiers: List[str] = [
+        ds.get("id")
+        for ds in datasources_from_files
+        if isinstance(ds, dict) and isinstance(ds.get("id"), str)
+    ]
+    connection: Connection
+    async with db_pool.acquire() as connection:
+        existing_identifiers: Set[str] = set(
+            await connection.fetchval(QUERY_SELECT_EXISTING_IDENTIFIERS, identifiers)
+        )
 
+    # Files are selected in order, later files with the same identifier are rejected
+    uploads: List[Coroutine] = []
+    scheduled: Set[str] = set()
+    reloaded: Set[str] = set()
+    semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+    for ds in datasources_from_files:
         if ds is not None:
             identifier = ds.get("id")
             if not isinstance(identifier, str):
@@ -1050,148 +1257,44 @@ async def upload_datasources_to_db(
                 )
                 continue
 
-            if datasource_ids is not None:
-                if identifier in datasource_ids:
-                    del_query: str = (
-                        f"DELETE FROM datasource WHERE identifier='{identifier}'"
-                    )
-                    try:
-                        await connection.execute(del_query)
-                    except Exception as e:
-                        message: str = (
-                            f"'reupload_datasources_to_db': error delete DataSource '{identifier}' {str(e)}"
-                        )
-                        logger.error(message)
-                        validation_errors.append(
-                            ErrorDetails(
-                                type="Database",
-                                loc=("delete_datasources",),
-                                input=f"{identifier}",
-                                msg=f"Error delete DataSource in DB: {e}",
-                                ctx={"datasource_id": f"{identifier}"},
-                            )
-                        )
-                        continue
-
-            record = await connection.fetchrow(
-                f"SELECT data FROM datasource WHERE identifier='{identifier}'"
-            )
-            if record is None:
-                data_type: str = ds.get("type")
-
-                try:
-                    # Validation DataSources
-                    if data_type == DataType.raster:
-                        pds: DataSourceRasterBase = DataSourceRasterBase.model_validate(
-                            ds
-                        )
-                    elif data_type == DataType.vector:
-                        pds: DataSourceVectorBase = DataSourceVectorBase.model_validate(
-                            ds
-                        )
-                        # Validate vector layers
-                        validation_vl_errors = await validate_vector_layers(
-                            pds, connection
-                        )
-                        if validation_vl_errors is not None:
-                            validation_errors.extend(validation_vl_errors)
-                            continue
-                    else:
-                        validation_errors.append(
-                            ErrorDetails(
-                                type="invalid",
-                                loc=("type",),
-                                msg=f"Invalid type of DataSource, must be 'raster' or 'vector'",
-                                input=f"{data_type}",
-                                ctx={"datasource_id": f"{identifier}"},
-                            )
-                        )
-                        continue
-
-                # ValidationError - General Exception describing all validation errors
-                except ValidationError as e:
-                    errors: List[ErrorDetails] = [
-                        ErrorDetails(
-                            type=err.get("type"),
-                            loc=err.get("loc"),
-                            msg=err.get("msg"),
-                            input=err.get("input"),
-                            ctx={"datasource_id": f"{identifier}"},
-                        )
-                        for err in e.errors()
-                    ]
-                    validation_errors.extend(errors)
-                    continue
-                except Exception as e:
-                    logger.error(f"Error validate DataSource {identifier}: {e}")
-                    validation_errors.append(
-                        ErrorDetails(
-                            type="internal",
-                            loc=("model_validate",),
-                            msg=f"Error validate DataSource '{identifier}': {e}",
-                            input=f"{identifier}",
-                            ctx={"datasource_id": f"{identifier}"},
-                        )
+            if identifier in scheduled:
+                validation_errors.append(
+                    ErrorDetails(
+                        type="duplicate",
+                        loc=("id",),
+                        msg="Duplicate 'id' of DataSource in files, file is skipped",
+                        input=f"{identifier}",
+                        ctx={"datasource_id": f"{identifier}"},
                     )
-                    continue
-
-                data_store_dict: Dict[str, Any] = ds.get("dataStore")
-                if isinstance(pds, DataSourceRasterBase):
-                    data_store_dict["dataset"] = pds.dataStore.dataset
-                    ds["dataStore"] = data_store_dict
-
-                store_type: str = data_store_dict.get("store")
-                host: str = data_store_dict.get("host")
-                port: int = data_store_dict.get("port")
-                description: Optional[str] = ds.get("description")
-                attribution: Optional[str] = ds.get("attribution")
-                minzoom: int = ds.get("minzoom") or MINZOOM
-                maxzoom: int = ds.get("maxzoom") or MAXZOOM
-                bounds: Dict[str, float] = ds.get("bounds")
-                center: List[float] = ds.get("center")
-                mbtiles: bool = ds.get("mbtiles") or False
-
-                params = (
-                    identifier,
-                    data_type,
-                    store_type,
-                    host,
-                    port,
-                    mbtiles,
-                    description,
-                    attribution,
-                    minzoom,
-                    maxzoom,
-                    bounds,
-                    center,
-                    ds,
                 )
+                continue
 
-                try:
-                    await connection.execute(
-                        QUERY_INSERT_DATASOURCE,
-                        *params,
-                    )
-                    count += 1
-                except Exception as e:
-                    validation_errors.append(
-                        ErrorDetails(
-                            type="Database",
-                            loc=("insert_datasource",),
-                            input=f"{identifier}",
-                            msg=f"Error insert DataSource in DB: {e}",
-                            ctx={"datasource_id": f"{identifier}"},
-                        )
-                    )
+            reload: bool = datasource_ids is not None and identifier in datasource_ids
+            if reload or identifier not in existing_identifiers:
+                scheduled.add(identifier)
+                if reload:
+                    reloaded.add(identifier)
+                uploads.append(upload_datasource(db_pool, semaphore, ds, identifier))
+
+    # Validation of DataSources runs concurrently on separate connections
+    for params, errors in await asyncio.gather(*uploads):
+        validation_errors.extend(errors)
+        if params is not None:
+            records.append(params)
+
+    if len(records) > 0:
+        # Only validated DataSources replace their rows
+        delete_identifiers: Set[str] = {
+            params[0] for params in records if params[0] in reloaded
+        }
+        async with db_pool.acquire() as connection:
+            count = await insert_datasources(
+                connection, records, delete_identifiers, validation_errors
+            )
 
     return count, validation_errors
 
 
-def default_dump(obj):
-    if isinstance(obj, ValueError):
-        return obj.args[0]
-
-
 @ds_router.post(
     "/datasources/reload_files",
     responses={200: {"content": {"application/json": {}}}},
@@ -1211,22 +1314,14 @@ async def load_datasources_from_files(
 
     try:
         db_pool: Pool = request.app.state.db_pool
-        connection: Connection
-        errors: List[ErrorDetails] = []
-        async with db_pool.acquire() as connection:
-            # Load Vector DataSources
-            if os.path.isdir(ds_vector_path):
-                vector_count, vector_errors = await upload_datasources_to_db(
-                    ds_vector_path, connection, datasource_ids
-                )
-            # Load Raster DataSources
-            if os.path.isdir(ds_raster_path):
-                raster_count, raster_errors = await upload_datasources_to_db(
-                    ds_raster_path, connection, datasource_ids
-                )
-            vector_errors.extend(raster_errors)
-            if len(vector_errors) > 0:
-                errors = vector_errors
+        # Vector and Raster DataSources are loaded concurrently
+        (vector_count, vector_errors), (raster_count, raster_errors) = (
+            await asyncio.gather(
+                upload_datasources_to_db(ds_vector_path, db_pool, datasource_ids),
+                upload_datasources_to_db(ds_raster_path, db_pool, datasource_ids),
+            )
+        )
+        errors: List[ErrorDetails] = vector_errors + raster_errors
     except Exception as e:
         message: str = (
             f"'load_datasources_from_files' error upload DataSources from files: {str(e)}"
@@ -1252,7 +1347,8 @@ async def load_datasources_from_files(
         "load_raster_datasources": raster_count,
         "errors": errors,
     }
-    content: bytes = orjson.dumps(data, default=default_dump)
+    # ErrorDetails hold only str and JSON values, orjson stays on its native path
+    content: bytes = orjson.dumps(data, option=ORJSON_OPTIONS)
 
     return Response(
         content=content,
@@ -1264,22 +1360,32 @@ class DeleteDataSource(BaseModel):
     datasource_id: str
 
 
+def detach_directory(directory: str) -> Optional[str]:
+    # Rename is instant, the same DataSource can be created again before removal ends
+    removed_dir: str = f"{directory}.{uuid4().hex}.removed"
+    try:
+        os.rename(directory, removed_dir)
+    except FileNotFoundError:
+        return None
+    return removed_dir
+
+
 @ds_router.delete(
     "/datasources",
     responses={200: {"content": {"application/json": {}}}},
-    response_class=JSONResponse,
+    response_class=ORJSONResponse,
 )
 async def delete_datasource(
     request: Request,
     del_ds: DeleteDataSource,
-) -> JSONResponse:
+    background_tasks: BackgroundTasks,
+) -> ORJSONResponse:
     ds_id: str = del_ds.datasource_id
-    query: str = f"DELETE FROM datasource WHERE identifier='{ds_id}'"
     try:
         db_pool: Pool = request.app.state.db_pool
         connection: Connection
         async with db_pool.acquire() as connection:
-            await connection.execute(query)
+            await connection.execute(QUERY_DELETE_DATASOURCE, ds_id)
     except Exception as e:
         message: str = (
             f"'delete_datasource': error delete DataSource '{ds_id}' {str(e)}"
@@ -1305,10 +1411,14 @@ async def delete_datasource(
 
     # 2. Clear 'data' and 'tiles' directories from DataSource folders
     try:
-        tiles_dir: str = os.path.join(request.app.state.root_path, "tiles", ds_id)
-        shutil.rmtree(tiles_dir, ignore_errors=True)
-        data_dir: str = os.path.join(request.app.state.root_path, "data", ds_id)
-        shutil.rmtree(data_dir, ignore_errors=True)
+        for folder in ("tiles", "data"):
+            directory: str = os.path.join(request.app.state.root_path, folder, ds_id)
+            removed_dir: Optional[str] = detach_directory(directory)
+            if removed_dir is not None:
+                # Large pyramids are removed in threadpool after the response is sent
+                background_tasks.add_task(
+                    shutil.rmtree, removed_dir, ignore_errors=True
+                )
     except Exception as e:
         message = (
             f"Worker {pid}, error remove DataSource '{ds_id}' directories: {str(e)}"
@@ -1318,4 +1428,4 @@ async def delete_datasource(
     content: Dict[str, str] = {
         "message": f"Worker {pid}, DataSource '{ds_id}' successfully remove"
     }
-    return JSONResponse(content=content)
+    return ORJSONResponse(content=content)
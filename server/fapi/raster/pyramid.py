@@ -22,6 +22,26 @@ from server.datasources import DataSource, RasterTileSettings
 
 logger = logging.getLogger(__name__)
 
+# Settings of DataSource copied to Pyramid under the same name, 'zoom' is built apart
+PYRAMID_SETTINGS_FIELDS = (
+    "mbtiles",
+    "resampling",
+    "tiledriver",
+    "tile_size",
+    "xyz",
+    "count_processes",
+    "warnings",
+    "save_tile_detail_db",
+    "warp",
+    "resampling_warp",
+    "remove_processing_raster_files",
+    "encode_to_rgba",
+    "mosaic_merge",
+    "nodata_default",
+    "pixel_selection_method",
+    "merge",
+)
+
 
 async def single_pyramid(
     request: Request, p: Pyramid, background_tasks: BackgroundTasks
@@ -52,7 +72,7 @@ async def single_pyramid(
             detail=f"'pyramid': validation error: {e}",
         )
 
-    id = str(uuid4())
+    id = uuid4().hex
     background_tasks.add_task(
         run_pyramid_in_threadpool, ds.data_store.file, options, id, root_path
     )
@@ -95,7 +115,7 @@ async def mosaics_pyramid(
             detail=f"'mosaics_pyramid': validation error: {e}",
         )
 
-    id = str(uuid4())
+    id = uuid4().hex
     background_tasks.add_task(
         run_mosaics_pyramid_in_threadpool, ds.data_store.folder, options, id, root_path
     )
@@ -110,21 +130,6 @@ async def mosaics_pyramid(
 
 
 def pyr_settings_to_pyramid(ts: RasterTileSettings, p: Pyramid):
-    p.mbtiles = ts.mbtiles
-    p.resampling = ts.resampling
-    p.tiledriver = ts.tiledriver
-    p.tile_size = ts.tile_size
-    p.xyz = ts.xyz
-    p.count_processes = ts.count_processes
+    for field in PYRAMID_SETTINGS_FIELDS:
+        setattr(p, field, getattr(ts, field))
     p.zoom = [ts.minzoom, ts.maxzoom]
-    p.mbtiles = ts.mbtiles
-    p.warnings = ts.warnings
-    p.save_tile_detail_db = ts.save_tile_detail_db
-    p.warp = ts.warp
-    p.resampling_warp = ts.resampling_warp
-    p.remove_processing_raster_files = ts.remove_processing_raster_files
-    p.encode_to_rgba = ts.encode_to_rgba
-    p.mosaic_merge = ts.mosaic_merge
-    p.nodata_default = ts.nodata_default
-    p.pixel_selection_method = ts.pixel_selection_method
-    p.merge = ts.merge
@@ -1,20 +1,30 @@
 import os
+import time
+import asyncio
 import logging
 import sqlite3
-import warnings
 
 import aiofiles.os as aios
-from typing import Optional
+from typing import Optional, Dict, List, Any, Union
 
-from fastapi import Response, Request, status
+from fastapi import FastAPI, Response, Request, status
 from starlette.exceptions import HTTPException
 
 from raster_tiles.single_tile.tile import mosaic_tile, tile
-from server.tile_utils import get_tile_job
-from server.datasources import DataSource, DataStoreRaster
+from server.tile_utils import (
+    NeighborTile,
+    NeighborMosaicTile,
+    TileJobCache,
+    get_tile_job,
+)
+from server.datasources import DataSource, DataStoreRaster, DataStoreRasterInternal
 
 logger = logging.getLogger(__name__)
 
+# Seconds between checks of modification time of dataset db
+MODIFIED_TIME_CHECK_INTERVAL = 0.5
+PNG_MEDIA_TYPE = "image/png"
+
 
 async def raster_tile(
     request: Request,
@@ -55,6 +65,85 @@ async def raster_tile(
     return tile
 
 
+async def get_cached_tile_job(
+    global_dependencies: Dict[str, TileJobCache],
+    key: str,
+    datasource_id: str,
+    root_path: str,
+) -> Optional[sqlite3.Row]:
+    dependency: Optional[TileJobCache] = global_dependencies.get(key)
+    if dependency is not None:
+        now: float = time.monotonic()
+        # db of dataset is checked at most once per interval, not per tile
+        if now - dependency.last_check > MODIFIED_TIME_CHECK_INTERVAL:
+            dependency.last_check = now
+            modified_time: float = os.path.getmtime(dependency.db_path)
+            # if db of dataset change than update tile_job
+            if modified_time != dependency.modified_time:
+                dependency.tile_job = await get_tile_job(dependency.db_path)
+                dependency.modified_time = modified_time
+        return dependency.tile_job
+
+    # Path of db is resolved on cold miss only, then it is kept in cache
+    db_path: str = os.path.join(root_path, "data", datasource_id, f"{key}.db")
+    if not await aios.path.isfile(db_path):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database file for datasource '{datasource_id}' not found",
+        )
+
+    tile_job: Optional[sqlite3.Row] = await get_tile_job(db_path)
+    modified_time = os.path.getmtime(db_path)
+    global_dependencies[key] = TileJobCache(
+        tile_job, db_path, modified_time, time.monotonic()
+    )
+    return tile_job
+
+
+async def prefetch_tile_jobs(app: FastAPI) -> None:
+    # Tile jobs of built datasets are read at startup, first tiles skip sqlite
+    tile_jobs: List[Any] = []
+    for datasource_id, ds in app.state.datasources.items():
+        # Only internal stores have dataset with tile job, other stores are external
+        if not isinstance(ds.data_store, DataStoreRasterInternal):
+            continue
+        dataset: str = ds.data_store.dataset
+        if not os.path.isfile(
+            os.path.join(app.state.root_path, "data", datasource_id, f"{dataset}.db")
+        ):
+            continue
+        dependencies: Dict[str, TileJobCache] = (
+            app.state.mosaics_dependencies
+            if ds.mosaics
+            else app.state.global_dependencies
+        )
+        tile_jobs.append(
+            get_cached_tile_job(
+                dependencies, dataset, datasource_id, app.state.root_path
+            )
+        )
+
+    for result in await asyncio.gather(*tile_jobs, return_exceptions=True):
+        if isinstance(result, Exception):
+            logger.error(f"'prefetch_tile_jobs': error get tile job: {result}")
+
+
+def tile_response(
+    tile_bytes: Optional[bytes], nts: List[Union[NeighborTile, NeighborMosaicTile]]
+) -> Response:
+    if tile_bytes:
+        return Response(content=tile_bytes, media_type=PNG_MEDIA_TYPE)
+
+    if tile_bytes is None and len(nts) > 1:
+        value_header_nts = ",".join([nt.header for nt in nts])
+        return Response(
+            status_code=status.HTTP_204_NO_CONTENT,
+            headers={"Nts": value_header_nts},
+        )
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 async def get_tile(
     datasource_id: str,
     request: Request,
@@ -66,46 +155,10 @@ async def get_tile(
     mbtiles: bool,
     root_path: str,
 ) -> Response:
-    # ignore warnings from rio-tiler, rasterio
-    warnings.filterwarnings("ignore")
-    global_dependencies = request.app.state.global_dependencies
     try:
-        if dataset in global_dependencies:
-            if isinstance(global_dependencies[dataset], dict):
-                db_path: str = global_dependencies[dataset]["db_path"]
-                modified_time_from_cache: float = global_dependencies[dataset][
-                    "modified_time"
-                ]
-                modified_time: float = os.path.getmtime(db_path)
-                # if db of dataset change than update tile_job
-                if modified_time != modified_time_from_cache:
-                    tile_job_update: Optional[sqlite3.Row] = await get_tile_job(db_path)
-                    global_dependencies[dataset]["tile_job"] = tile_job_update
-                    tile_job: Optional[sqlite3.Row] = tile_job_update
-                    global_dependencies[dataset]["modified_time"] = modified_time
-                else:
-                    tile_job: Optional[sqlite3.Row] = global_dependencies[dataset][
-                        "tile_job"
-                    ]
-        else:
-            db_path: str = os.path.join(
-                root_path, "data", datasource_id, f"{dataset}.db"
-            )
-
-            if not await aios.path.isfile(db_path):
-                return Response(
-                    content=f"Database file for datasource '{datasource_id}' not found",
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
-
-            tile_job: Optional[sqlite3.Row] = await get_tile_job(db_path)
-            modified_time = os.path.getmtime(db_path)
-            global_dependencies[dataset] = {
-                "tile_job": tile_job,
-                "db_path": db_path,
-                "modified_time": modified_time,
-            }
-
+        tile_job: Optional[sqlite3.Row] = await get_cached_tile_job(
+            request.app.state.global_dependencies, dataset, datasource_id, root_path
+        )
         tile_bytes, nts = await tile(
             request.app.state.root_path,
             datasource_id,
@@ -126,17 +179,7 @@ async def get_tile(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"{e}"
         )
 
-    if tile_bytes:
-        return Response(content=tile_bytes, media_type="image/png")
-
-    if tile_bytes is None and len(nts) > 1:
-        value_header_nts = ",".join(f"{nt.t.x}_{nt.t.y}_{nt.t.z}" for nt in nts)
-        return Response(
-            status_code=status.HTTP_204_NO_CONTENT,
-            headers={"Nts": value_header_nts},
-        )
-
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
+    return tile_response(tile_bytes, nts)
 
 
 async def get_mosaics_tile(
@@ -150,46 +193,13 @@ async def get_mosaics_tile(
     mbtiles: bool,
     root_path: str,
 ) -> Response:
-    # ignore warnings from rio-tiler, rasterio
-    warnings.filterwarnings("ignore")
-    global_dependencies = request.app.state.global_dependencies
     try:
-        dst = f"mosaics_{dataset}"
-        if dst in global_dependencies:
-            if isinstance(global_dependencies[dst], dict):
-                db_path: str = global_dependencies[dst]["db_path"]
-                modified_time_from_cache: float = global_dependencies[dst][
-                    "modified_time"
-                ]
-                modified_time: float = os.path.getmtime(db_path)
-                # if db of dataset change than update tile_job
-                if modified_time != modified_time_from_cache:
-                    tile_job_update: Optional[sqlite3.Row] = await get_tile_job(db_path)
-                    global_dependencies[dst]["tile_job"] = tile_job_update
-                    tile_job: Optional[sqlite3.Row] = tile_job_update
-                    global_dependencies[dst]["modified_time"] = modified_time
-                else:
-                    tile_job: Optional[sqlite3.Row] = global_dependencies[dst][
-                        "tile_job"
-                    ]
-        else:
-            db_path: str = os.path.join(
-                root_path, "data", datasource_id, f"{dataset}.db"
-            )
-            if not await aios.path.isfile(db_path):
-                return Response(
-                    content=f"Database file for datasource '{datasource_id}' not found",
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
-
-            tile_job: Optional[sqlite3.Row] = await get_tile_job(db_path)
-            modified_time = os.path.getmtime(db_path)
-            global_dependencies[dst] = {
-                "tile_job": tile_job,
-                "db_path": db_path,
-                "modified_time": modified_time,
-            }
-
+        tile_job: Optional[sqlite3.Row] = await get_cached_tile_job(
+            request.app.state.mosaics_dependencies,
+            dataset,
+            datasource_id,
+            root_path,
+        )
         tile_bytes, nts = await mosaic_tile(
             request.app.state.root_path,
             datasource_id,
@@ -209,14 +219,4 @@ async def get_mosaics_tile(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"{e}"
         )
 
-    if tile_bytes:
-        return Response(content=tile_bytes, media_type="image/png")
-
-    if tile_bytes is None and len(nts) > 1:
-        value_header_nts = ",".join(f"{nt.t.x}_{nt.t.y}_{nt.t.z}" for nt in nts)
-        return Response(
-            status_code=status.HTTP_204_NO_CONTENT,
-            headers={"Nts": value_header_nts},
-        )
-
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
+    return tile_response(tile_bytes, nts)
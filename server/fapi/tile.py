@@ -1,5 +1,4 @@
 import logging
-import orjson
 
 from typing import Optional
 from fastapi import APIRouter, Response, Request, BackgroundTasks, HTTPException, status
@@ -12,6 +11,9 @@ from server.fapi.utils import try_load_datasource_from_db
 tiles_router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Body is formatted from ints only, no JSON escaping is needed
+ZOOM_OUT_OF_RANGE = b'{"message":"Zoom should be in range %d-%d, got %d"}'
+
 
 @tiles_router.get("/tile/{datasource_id}/{z}/{x}/{y}.{ext}", response_class=Response)
 async def get_tile(
@@ -32,11 +34,7 @@ async def get_tile(
         return Response(
             status_code=status.HTTP_400_BAD_REQUEST,
             media_type="application/json",
-            content=orjson.dumps(
-                {
-                    "message": f"Zoom should be in range {ds.minzoom}-{ds.maxzoom}, got {z}"
-                }
-            ),
+            content=ZOOM_OUT_OF_RANGE % (ds.minzoom, ds.maxzoom, z),
         )
 
     try:
@@ -1,11 +1,13 @@
 import os
 import sys
+import time
 import asyncio
+import orjson
 
+from functools import lru_cache
 from typing import Dict, Optional, Any
 from dotenv import dotenv_values
 from pathlib import Path
-from bestconfig import Config
 
 from fastapi import Request, HTTPException, status, FastAPI
 
@@ -13,26 +15,39 @@ from server.fapi.ds import load_datasource_from_db, save_datasource_from_db_to_a
 from server.datasources import DataSource
 
 MAPTILER_ERROR = "Out of bounds"
+MAPTILER_ERROR_BYTES = MAPTILER_ERROR.encode("utf-8")
 
+# Unknown DataSource IDs are answered without DB round-trip for a while,
+# DataSource created by another worker becomes visible after TTL at most
+MISSING_DATASOURCE_TTL: float = 30.0
+MISSING_DATASOURCES_MAXSIZE: int = 1024
 
-def initialize_event_loop():
+# DataSource ID -> expiration time of negative result
+_missing_datasources: Dict[str, float] = {}
+
+
+def install_event_loop_policy():
     if sys.platform.startswith("win32") or sys.platform.startswith("linux-cross"):
         import winloop  # type: ignore[import-not-found]
 
         winloop.install()
-        loop = winloop.new_event_loop()
-        asyncio.set_event_loop(loop)
     else:
         # uv loop doesn't support windows or arm machines at the moment
         # but uv loop is much faster than native asyncio
         import uvloop  # type: ignore[import-not-found]
 
         uvloop.install()
-        loop = uvloop.new_event_loop()
-        asyncio.set_event_loop(loop)
+
+
+def initialize_event_loop():
+    install_event_loop_policy()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
 
 
 # Load environments variables from .env file (from root folder)
+# File is parsed once per process, callers must not modify returned dict
+@lru_cache(maxsize=1)
 def load_environments_from_file() -> Dict[str, str]:
     root_path: str = str(Path(__file__).parents[2])
     dotenv_path = os.path.join(root_path, ".env")
@@ -43,14 +58,30 @@ def load_environments_from_file() -> Dict[str, str]:
 async def try_load_datasource_from_db(
     request: Request, datasource_id: str
 ) -> DataSource:
+    now: float = time.monotonic()
+    expires: Optional[float] = _missing_datasources.get(datasource_id)
+    if expires is not None and expires > now:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Datasource ID '{datasource_id}' not found",
+        )
+
     # Try load DataSource from DB
     ds_from_db: Optional[Dict[str, Any]] = await load_datasource_from_db(
         request.app.state.db_pool, datasource_id
     )
     if ds_from_db is not None:
+        _missing_datasources.pop(datasource_id, None)
         ds = save_datasource_from_db_to_app_state(request, ds_from_db)
         return ds
     else:
+        if len(_missing_datasources) >= MISSING_DATASOURCES_MAXSIZE:
+            # Drop expired entries, storm of distinct IDs resets the cache
+            for key in [k for k, v in _missing_datasources.items() if v <= now]:
+                del _missing_datasources[key]
+            if len(_missing_datasources) >= MISSING_DATASOURCES_MAXSIZE:
+                _missing_datasources.clear()
+        _missing_datasources[datasource_id] = now + MISSING_DATASOURCE_TTL
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Datasource ID '{datasource_id}' not found",
@@ -59,4 +90,6 @@ async def try_load_datasource_from_db(
 
 def load_config_app(app: FastAPI):
     config_path: str = os.path.join(app.state.root_path, "config_app.json")
-    app.state.config = Config(config_path)
+    # File is parsed once at startup, settings are read from a plain dict
+    with open(config_path, "rb") as f:
+        app.state.config: Dict[str, Any] = orjson.loads(f.read())
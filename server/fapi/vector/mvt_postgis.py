@@ -1,14 +1,16 @@
+import asyncio
 import logging
-import re
 
 from fastapi import HTTPException, status
 from asyncpg import Connection
 from asyncpg.pool import Pool
 
-from typing import Dict, List, Optional
+from typing import Any, List, Optional, Tuple
+from functools import lru_cache
 from math import pi
 
-from server.datasources import DataSourceVector, VectorDataLayer
+from server.datasources import DataSourceVector, VectorDataLayer, MINZOOM, MAXZOOM
+from server.fapi.db import mvt_layer_concurrency
 
 logger = logging.getLogger(__name__)
 
@@ -16,39 +18,13 @@ MAP_WIDTH_IN_METRES: float = 40075016.68557849
 TILE_WIDTH_IN_PIXELS: float = 4096.0
 STANDARDIZED_PIXEL_SIZE: float = 0.00028
 
-
-def tile_to_envelope(z: int, x: int, y: int) -> Dict[str, float]:
-
-    # Width of world in EPSG:3857
-    world_mercator_max: float = 20037508.3427892
-    world_mercator_min: float = -1 * world_mercator_max
-    world_mercator_size: float = world_mercator_max - world_mercator_min
-
-    # Width in tiles
-    world_tile_size: int = 2**z
-
-    # Tile width in EPSG:3857
-    tile_merc_size: float = world_mercator_size / world_tile_size
-
-    # Calculate geographic bounds from tile coordinates
-    # XYZ tile coordinates are in "image space" so origin is
-    # top-left, not bottom right
-    env: Dict[str, float] = {}
-    env["xmin"] = world_mercator_min + tile_merc_size * x
-    env["xmax"] = world_mercator_min + tile_merc_size * (x + 1)
-    env["ymin"] = world_mercator_max - tile_merc_size * (y + 1)
-    env["ymax"] = world_mercator_max - tile_merc_size * (y)
-
-    return env
-
-
-def envelope_to_bounds_sql(bounds: Dict[str, float]) -> str:
-    DENSIFY_FACTOR = 4
-    bounds["segment_size"] = (bounds["xmax"] - bounds["xmin"]) / DENSIFY_FACTOR
-    segment: str = (
-        "ST_Segmentize(ST_MakeEnvelope({xmin}, {ymin}, {xmax}, {ymax}, 3857),{segment_size})"
-    )
-    return segment.format(**bounds)
+# Values depending only on zoom are computed once for zooms 0-30
+TOLERANCE_ZOOMS = range(31)
+TOLERANCE_WITHOUT_EXTENT: List[float] = [
+    (1 if z > 5 else (2.2 - 0.2 * z)) * MAP_WIDTH_IN_METRES / (1 << z)
+    for z in TOLERANCE_ZOOMS
+]
+TOLERANCE2: List[float] = [6378137 * 2 * pi / (1 << (z + 8)) for z in TOLERANCE_ZOOMS]
 
 
 def tolerance(zoom: int, extent: int) -> float:
@@ -57,19 +33,15 @@ def tolerance(zoom: int, extent: int) -> float:
     Takes a web mercator zoom level and returns the pixel resolution for that
     scale according to the global TILE_WIDTH_IN_PIXELS size
     """
-    tolerance_multiplier: float = 1 if zoom > 5 else (2.2 - 0.2 * zoom)
-    t: float = tolerance_multiplier * MAP_WIDTH_IN_METRES / (extent * (2**zoom))
-    return t
+    return TOLERANCE_WITHOUT_EXTENT[zoom] / extent
 
 
 def tolerance2(zoom: int) -> float:
-    return 6378137 * 2 * pi / (2 ** (zoom + 8))
+    return TOLERANCE2[zoom]
 
 
+@lru_cache(maxsize=1024)
 def query_layer_of_mvt(
-    z: int,
-    x: int,
-    y: int,
     simplify: bool,
     sub_query_layer: str,
     extent: int,
@@ -77,69 +49,96 @@ def query_layer_of_mvt(
     fields_from_subquery: str,
     geom_field: str,
     layer_id: str,
-) -> Optional[str]:
+) -> str:
+    # Statement of layer is built once, tile is bound as $1 = z, $2 = x, $3 = y
+    # and tolerance of simplification as $4, PostgreSQL plans the statement once
     if simplify:
-        scale = tolerance(z, extent) if z > 11 else tolerance2(z)
-        simplify_str: str = f"ST_SimplifyPreserveTopology(t.{geom_field}, {scale})"
+        simplify_str: str = f"ST_SimplifyPreserveTopology(t.{geom_field}, $4::float8)"
     else:
         simplify_str = f"t.{geom_field}"
 
     q: str = (
-        f"(\
-            WITH mvtgeom AS (\
-                SELECT\
-                    ST_AsMVTGeom({simplify_str}, ST_TileEnvelope({z}, {x}, {y})) AS geom{fields_from_subquery}\
-                FROM ({sub_query_layer}) AS t WHERE t.{geom_field} IS NOT NULL\
-                    AND t.{geom_field} && ST_TileEnvelope({z}, {x}, {y}{margin})\
-            )\
-            SELECT ST_AsMVT(mvtgeom.*, '{layer_id}', {extent}, 'geom') AS mvt FROM mvtgeom\
-        )"
+        f"SELECT (WITH mvtgeom AS ("
+        f"SELECT ST_AsMVTGeom({simplify_str}, ST_TileEnvelope($1, $2, $3)) AS geom{fields_from_subquery} "
+        f"FROM ({sub_query_layer}) AS t WHERE t.{geom_field} IS NOT NULL "
+        f"AND t.{geom_field} && ST_TileEnvelope($1, $2, $3{margin})"
+        f") SELECT ST_AsMVT(mvtgeom.*, '{layer_id}', {extent}, 'geom') AS mvt FROM mvtgeom)"
     )
     return q
 
 
-async def generate_mvt(
-    ds: DataSourceVector, db_pool: Pool, z: int, x: int, y: int
-) -> bytes:
+async def query_layers(
+    db_pool: Pool, queries: List[Tuple[str, Tuple[Any, ...]]]
+) -> List[Any]:
+    # Layers are encoded by separate backends of PostgreSQL at the same time,
+    # at most mvt_layer_concurrency() connections of pool are held, each is reused
+    results: List[Any] = [None] * len(queries)
+    pending = iter(enumerate(queries))
+
+    async def run_queries() -> None:
+        connection: Connection
+        async with db_pool.acquire() as connection:
+            for i, (query, args) in pending:
+                results[i] = await connection.fetchval(query, *args)
+
+    count_connections: int = min(len(queries), mvt_layer_concurrency())
+    if count_connections == 1:
+        await run_queries()
+    else:
+        await asyncio.gather(*(run_queries() for _ in range(count_connections)))
+    return results
 
-    if ds.layers is not None:
-        queries: List[str] = []
-        for layer in ds.layers:  # type: VectorDataLayer
-            if z < layer.minzoom or z > layer.maxzoom:
-                continue
-
-            if layer.queries is not None:
-                ql_mvt: Optional[str] = query_layer_of_mvt_from_sql(
-                    z, x, y, ds.margin, layer
-                )
-            else:
-                ql_mvt = query_layer_of_mvt(
-                    z,
-                    x,
-                    y,
-                    layer.simplify,
-                    layer.query,
-                    ds.extent,
-                    ds.margin,
-                    layer.fields_from_subquery,
-                    layer.geom_field,
-                    layer.id,
-                )
 
+def queries_of_zoom(ds: DataSourceVector, z: int) -> List[Tuple[str, bool]]:
+    # Statements of layers visible at zoom and whether tolerance is bound as $4
+    queries: List[Tuple[str, bool]] = []
+    for layer in ds.layers_by_zoom[z]:  # type: VectorDataLayer
+        if layer.queries is not None:
+            ql_mvt: Optional[str] = query_layer_of_mvt_from_sql(z, ds.margin, layer)
             if ql_mvt is not None:
-                queries.append(ql_mvt)
+                queries.append((ql_mvt, False))
+        else:
+            ql_mvt = query_layer_of_mvt(
+                layer.simplify,
+                layer.query,
+                ds.extent,
+                ds.margin,
+                layer.fields_from_subquery,
+                layer.geom_field,
+                layer.id,
+            )
+            queries.append((ql_mvt, layer.simplify))
+    return queries
+
+
+def scale_of_zoom(ds: DataSourceVector, z: int) -> float:
+    return tolerance(z, ds.extent) if z > 11 else tolerance2(z)
 
+
+async def generate_mvt(
+    ds: DataSourceVector, db_pool: Pool, z: int, x: int, y: int
+) -> bytes:
+
+    if ds.layers is not None and MINZOOM <= z <= MAXZOOM:
+        queries: List[Tuple[str, bool]] = queries_of_zoom(ds, z)
         # None of the layers fall within the zoom range
         if len(queries) == 0:
             return b""
 
-        queries_joined = "||".join(queries)
-        query = re.sub(r"\s+", " ", f"SELECT {queries_joined} AS mvt_tile")
+        args: Tuple[int, int, int] = (z, x, y)
+        args_simplify: Tuple[Any, ...] = args
+        if any(simplify for _, simplify in queries):
+            args_simplify = (z, x, y, scale_of_zoom(ds, z))
 
         try:
-            connection: Connection
-            async with db_pool.acquire() as connection:
-                mvt: Optional[bytes] = await connection.fetchval(query)
+            # MVT of tile is concatenation of MVT of its layers
+            mvts: List[Optional[bytes]] = await query_layers(
+                db_pool,
+                [
+                    (query, args_simplify if simplify else args)
+                    for query, simplify in queries
+                ],
+            )
         except Exception as e:
             message: str = (
                 f"'generate_mvt': error create vector tile {z}/{x}/{y}: {str(e)}"
@@ -149,34 +148,82 @@ async def generate_mvt(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message
             )
 
-        return mvt
+        return b"".join([mvt or b"" for mvt in mvts])
 
     return b""
 
 
+@lru_cache(maxsize=1024)
+def query_layer_of_mvt_batch(ql_mvt: str) -> str:
+    # Same statement for many tiles of one zoom: $1 = z, $2 and $3 are arrays of x and y
+    # Alias of coordinates must not collide with alias 't' of layer subquery
+    ql_tile: str = ql_mvt.removeprefix("SELECT ").replace(
+        "ST_TileEnvelope($1, $2, $3", "ST_TileEnvelope($1, tile_coords.x, tile_coords.y"
+    )
+    return (
+        f"SELECT array_agg({ql_tile} ORDER BY tile_coords.n) "
+        f"FROM unnest($2::int[], $3::int[]) WITH ORDINALITY AS tile_coords(x, y, n)"
+    )
+
+
+async def generate_mvt_batch(
+    ds: DataSourceVector, db_pool: Pool, z: int, xs: List[int], ys: List[int]
+) -> List[bytes]:
+    # Tiles of one zoom are encoded with one round-trip per layer instead of per tile
+    if ds.layers is None or not (MINZOOM <= z <= MAXZOOM):
+        return [b""] * len(xs)
+
+    queries: List[Tuple[str, bool]] = queries_of_zoom(ds, z)
+    if len(queries) == 0:
+        return [b""] * len(xs)
+
+    args: Tuple[Any, ...] = (z, xs, ys)
+    args_simplify: Tuple[Any, ...] = args
+    if any(simplify for _, simplify in queries):
+        args_simplify = (z, xs, ys, scale_of_zoom(ds, z))
+
+    try:
+        mvts_of_layers: List[Optional[List[Optional[bytes]]]] = await query_layers(
+            db_pool,
+            [
+                (query_layer_of_mvt_batch(query), args_simplify if simplify else args)
+                for query, simplify in queries
+            ],
+        )
+    except Exception as e:
+        message: str = (
+            f"'generate_mvt_batch': error create vector tiles of zoom {z}: {str(e)}"
+        )
+        logger.error(message)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message
+        )
+
+    return [
+        b"".join([mvts[i] or b"" for mvts in mvts_of_layers if mvts and i < len(mvts)])
+        for i in range(len(xs))
+    ]
+
+
+@lru_cache(maxsize=1024)
 def query_layer_of_mvt_from_sql(
-    z: int, x: int, y: int, margin: str, layer: VectorDataLayer
+    z: int, margin: str, layer: VectorDataLayer
 ) -> Optional[str]:
+    # Statement depends only on zoom, it is built once per zoom of layer
     layer_queries: List[str] = []
-    for layer_query in layer.queries:  # type: LayerQuerySQL
-        if z >= layer_query.minzoom and z <= layer_query.maxzoom:
-            layer_query_sql: str = layer_query.sql
-            layer_query_sql = layer_query_sql.strip()
-            layer_query_sql = re.sub(r"\s+", " ", layer_query_sql)
-            layer_query_sql = layer_query_sql.replace(";", "")
-            layer_query_sql = layer_query_sql.replace("$zoom", str(z))
-            sub_query: str = (
-                f"SELECT\
-                    ST_AsMVTGeom(t.geom, ST_TileEnvelope({z}, {x}, {y})) AS geom,\
-                    t.tags - 'id' AS tags\
-                FROM ({layer_query_sql}) AS t WHERE t.geom IS NOT NULL\
-                    AND t.geom && ST_TileEnvelope({z}, {x}, {y}{margin})"
-            )
-            layer_queries.append(sub_query)
+    for layer_query in layer.queries_by_zoom[z]:  # type: LayerQuerySQL
+        layer_query_sql: str = layer_query.sql.replace("$zoom", str(z))
+        sub_query: str = (
+            f"SELECT ST_AsMVTGeom(t.geom, ST_TileEnvelope($1, $2, $3)) AS geom, "
+            f"t.tags - 'id' AS tags "
+            f"FROM ({layer_query_sql}) AS t WHERE t.geom IS NOT NULL "
+            f"AND t.geom && ST_TileEnvelope($1, $2, $3{margin})"
+        )
+        layer_queries.append(sub_query)
 
     if len(layer_queries) > 0:
         layer_queries_joined = "\nUNION ALL\n".join(layer_queries)
-        layer_queries_format_str = f"(SELECT ST_AsMVT(mvtGeom.*, '{layer.id}') FROM ({layer_queries_joined}) AS mvtGeom)"
+        layer_queries_format_str = f"SELECT (SELECT ST_AsMVT(mvtGeom.*, '{layer.id}') FROM ({layer_queries_joined}) AS mvtGeom)"
         return layer_queries_format_str
 
     return None
@@ -2,31 +2,29 @@ import os
 import logging
 import asyncio
 import aiosqlite
-import sqlite3
 import aiofiles.os as aio_os
 import multiprocessing
-import copy
 import morecantile
 import asyncpg
 import math
 import gzip
 
 from asyncpg.pool import Pool
-from itertools import islice
+from itertools import islice, chain, groupby
+from functools import lru_cache
 from concurrent_log_handler import ConcurrentTimedRotatingFileHandler as _
 from uuid import uuid4
 from typing import List, Optional, Iterator, Generator, Tuple, Any, Iterable, Set
 from asyncio import Task
 
-from bestconfig import Config
 from morecantile.commons import Tile
 from starlette.concurrency import run_in_threadpool
 from fastapi import BackgroundTasks, HTTPException, Request, status
 from fastapi.responses import JSONResponse
 
 from server.fapi.db import dsn_postgresql, set_connection_type_codec
-from server.fapi.utils import initialize_event_loop
-from server.fapi.vector.mvt_postgis import generate_mvt
+from server.fapi.utils import install_event_loop_policy
+from server.fapi.vector.mvt_postgis import generate_mvt_batch
 from server.datasources import DataSource, VECTOR, StoreType
 from server.pyramid_utils import (
     Pyramid,
@@ -36,11 +34,26 @@ from server.pyramid_utils import (
 )
 from server.sqlite_db import sqlite_db_connect_async
 from server.tile_utils import save_tile_on_disk
-from server.mbtiles import async_mbtiles_setup
+from server.mbtiles import (
+    async_mbtiles_setup,
+    async_mbtiles_bulk_load_setup,
+    async_mbtiles_ensure_tiles_index,
+)
 
 
 logger = logging.getLogger(__name__)
 
+# Tiles written to mbtiles between commits, each commit forces sync of WAL
+MBTILES_COMMIT_ROWS: int = 10000
+# Tiles inserted by one statement, 4 bound parameters per tile
+MBTILES_INSERT_ROWS: int = 500
+# Level 6 of zlib, level 9 of gzip by default is much slower for few bytes less
+GZIP_COMPRESS_LEVEL: int = 6
+# Batches waiting for mbtiles or disk, generation of tiles pauses above the limit
+MAX_PENDING_SAVE_TASKS: int = 8
+# Tiles of one zoom encoded by one statement per layer
+MVT_BATCH_TILES: int = 16
+
 
 async def single_pyramid(
     request: Request, p: Pyramid, background_tasks: BackgroundTasks
@@ -60,7 +73,7 @@ async def single_pyramid(
         # pyramid allready running
         return {"pyramid_id": running_pyramid_id, "already_running": True}
 
-    id_pyramid = str(uuid4())
+    id_pyramid = uuid4().hex
     await set_state_pyramid(1, 0, id_pyramid, root_path, None, VECTOR, p.datasource_id)
 
     background_tasks.add_task(
@@ -151,10 +164,9 @@ def vector_pyramid_with_loop(
     root_path: str,
     id_pyramid: str,
 ) -> None:
-    initialize_event_loop()
-    loop = asyncio.get_event_loop()
-    loop.run_until_complete(vector_pyramid(ds, datasource_id, root_path, id_pyramid))
-    loop.close()
+    # Loop of uvloop policy is created and closed by asyncio.run
+    install_event_loop_policy()
+    asyncio.run(vector_pyramid(ds, datasource_id, root_path, id_pyramid))
 
 
 async def vector_pyramid(
@@ -192,11 +204,15 @@ async def vector_pyramid(
         if not await aio_os.path.isfile(mbtiles_db):
             connection = await sqlite_db_connect_async(mbtiles_db)
             cursor = await connection.cursor()
-            await async_mbtiles_setup(cursor)
+            await async_mbtiles_bulk_load_setup(cursor)
+            await async_mbtiles_setup(cursor, deferred_index=True)
         else:
             connection = await sqlite_db_connect_async(mbtiles_db)
             cursor = await connection.cursor()
+            await async_mbtiles_bulk_load_setup(cursor)
             await cursor.execute("DELETE FROM tiles;")
+            # File left by interrupted pyramid may have no unique index of tiles
+            await async_mbtiles_ensure_tiles_index(cursor)
             await connection.commit()
             await cursor.execute("VACUUM;")
             await connection.commit()
@@ -211,41 +227,41 @@ async def vector_pyramid(
         ]
         ti = tiles_iterator(bounds, ds.pyr_settings.minzoom, ds.pyr_settings.maxzoom)
         running_tasks: Set[Task] = set()
-        for batched_tiles in batched(ti, db_pool_size):
+        count_batch: int = db_pool_size * MVT_BATCH_TILES
+        uncommitted: UncommittedTiles = UncommittedTiles()
+        for batched_tiles in batched(ti, count_batch):
+            # Batch is split by zoom into chunks, chunks are encoded in parallel
             tasks_mvt = [
-                get_vector_tile(
-                    db_pool,
-                    ds,
-                    datasource_id,
-                    tile.z,
-                    tile.x,
-                    tile.y,
-                    "mvt",
-                    root_path,
-                )
-                for tile in batched_tiles
+                get_vector_tiles(db_pool, ds, datasource_id, z, chunk, "mvt", root_path)
+                for z, tiles_of_zoom in groupby(batched_tiles, key=lambda t: t.z)
+                for chunk in batched(tiles_of_zoom, MVT_BATCH_TILES)
             ]
             try:
                 results = await asyncio.gather(*tasks_mvt, return_exceptions=True)
-                tiles_for_save: List[MVTile] = []
-                for res in results:
-                    if isinstance(res, Exception):
-                        continue
-                    if res is not None and isinstance(res, MVTile):
-                        tiles_for_save.append(res)
+                # List is created for each batch, task of saving takes ownership of it
+                tiles_for_save: List[MVTile] = [
+                    mvtile
+                    for res in results
+                    if not isinstance(res, Exception)
+                    for mvtile in res
+                ]
 
                 if len(tiles_for_save) > 0:
+                    if len(running_tasks) >= MAX_PENDING_SAVE_TASKS:
+                        await asyncio.wait(
+                            running_tasks, return_when=asyncio.FIRST_COMPLETED
+                        )
                     task: Task = asyncio.create_task(
                         save_batched_mvt_tiles(
-                            copy.deepcopy(tiles_for_save),
+                            tiles_for_save,
                             ds.mbtiles,
                             mbtiles_db,
                             connection,
                             cursor,
                             ds.compress_tiles,
+                            uncommitted,
                         )
                     )
-                    tiles_for_save.clear()
                     # Add task to the set. This creates a strong reference.
                     running_tasks.add(task)
                     # To prevent keeping references to finished tasks forever,
@@ -257,26 +273,47 @@ async def vector_pyramid(
         logger.error(f"Error 'vector_pyramid': {e}")
     finally:
         if cursor is not None and connection is not None:
-            attempts = 30
-            for i in range(0, attempts):
-                await asyncio.sleep(1)
-                if len(running_tasks) == 0:
-                    await cursor.close()
-                    await connection.close()
-                    break
-                if attempts == i + 1:
-                    for task in running_tasks:
-                        try:
-                            task.cancel()
-                        except:
-                            pass
-                    await asyncio.sleep(5)
-                    await cursor.close()
-                    await connection.close()
+            try:
+                attempts = 30
+                for i in range(0, attempts):
+                    await asyncio.sleep(1)
+                    if len(running_tasks) == 0:
+                        break
+                    if attempts == i + 1:
+                        for task in running_tasks:
+                            try:
+                                task.cancel()
+                            except:
+                                pass
+                        await asyncio.sleep(5)
+            finally:
+                # Index of tiles is built on every way out, also on cancellation
+                await close_mbtiles(connection, cursor)
 
         await set_state_pyramid(0, 1, id_pyramid, root_path)
 
 
+async def close_mbtiles(
+    connection: aiosqlite.Connection, cursor: aiosqlite.Cursor
+) -> None:
+    try:
+        await async_mbtiles_ensure_tiles_index(cursor)
+    except Exception as e:
+        logger.error(f"Error create index of tiles in MBTiles: {e}")
+    finally:
+        await cursor.close()
+        await connection.commit()
+        await connection.close()
+
+
+class UncommittedTiles:
+    # Tiles inserted by save tasks since last commit of mbtiles
+    __slots__ = ("count",)
+
+    def __init__(self):
+        self.count: int = 0
+
+
 class MVTile:
     __slots__ = ("x", "y", "z", "mvt", "tile_file_name")
 
@@ -288,30 +325,32 @@ class MVTile:
         self.tile_file_name = tile_file_name
 
 
-async def get_vector_tile(
+async def get_vector_tiles(
     db_pool: Pool,
     ds: DataSource,
     datasource_id: str,
     z: int,
-    x: int,
-    y: int,
+    tiles: Tuple[Tile, ...],
     ext: str,
     root_path: str,
-) -> Optional[MVTile]:
-    mvt: bytes = await generate_mvt(ds, db_pool, z, x, y)
+) -> List[MVTile]:
+    mvts: List[bytes] = await generate_mvt_batch(
+        ds, db_pool, z, [t.x for t in tiles], [t.y for t in tiles]
+    )
     # Save only not empty tiles
-    if mvt != b"":
-        tile_file_name: str = os.path.join(
-            f"{root_path}",
-            "tiles",
-            datasource_id,
-            f"{z}",
-            f"{x}",
-            f"{y}.{ext}",
+    return [
+        MVTile(
+            z,
+            t.x,
+            t.y,
+            mvt,
+            os.path.join(
+                f"{root_path}", "tiles", datasource_id, f"{z}", f"{t.x}", f"{t.y}.{ext}"
+            ),
         )
-        return MVTile(z, x, y, mvt, tile_file_name)
-
-    return None
+        for t, mvt in zip(tiles, mvts)
+        if mvt != b""
+    ]
 
 
 async def save_batched_mvt_tiles(
@@ -321,6 +360,7 @@ async def save_batched_mvt_tiles(
     connection: Optional[aiosqlite.Connection],
     cursor: Optional[aiosqlite.Cursor],
     compress_tiles: bool,
+    uncommitted: UncommittedTiles,
 ) -> None:
     if (
         mbtiles
@@ -328,32 +368,21 @@ async def save_batched_mvt_tiles(
         and connection is not None
         and cursor is not None
     ):
-        ts = [
-            (
-                t.z,
-                t.x,
-                t.y,
-                sqlite3.Binary(gzip.compress(t.mvt) if compress_tiles else t.mvt),
-            )
-            for t in tiles
-        ]
+        if compress_tiles:
+            # zlib releases GIL, tiles are compressed while loop serves other tasks
+            ts = await asyncio.to_thread(compress_mvt_tiles, tiles)
+        else:
+            # bytes are bound as BLOB as is, without memoryview wrapper per tile
+            ts = [(t.z, t.x, t.y, t.mvt) for t in tiles]
         try:
-            await cursor.executemany(
-                """INSERT OR IGNORE INTO tiles (zoom_level, tile_column, tile_row, tile_data) values (?, ?, ?, ?);""",
-                ts,
-            )
-            await connection.commit()
+            await insert_mvt_tiles(connection, cursor, ts, uncommitted)
         except aiosqlite.OperationalError as e:
             # Exception `database is locked`
             attempts = 10
             for i in range(0, attempts):
                 await asyncio.sleep(0.2)
                 try:
-                    await cursor.executemany(
-                        """INSERT OR IGNORE INTO tiles (zoom_level, tile_column, tile_row, tile_data) values (?, ?, ?, ?);""",
-                        ts,
-                    )
-                    await connection.commit()
+                    await insert_mvt_tiles(connection, cursor, ts, uncommitted)
                 except Exception as exc:
                     if i == (attempts - 1):
                         logger.error(
@@ -381,6 +410,43 @@ async def save_batched_mvt_tiles(
             logger.error(f"Error save MVTiles on disk: {e}")
 
 
+def compress_mvt_tiles(tiles: List[MVTile]) -> List[Tuple[int, int, int, bytes]]:
+    return [
+        (
+            t.z,
+            t.x,
+            t.y,
+            gzip.compress(t.mvt, compresslevel=GZIP_COMPRESS_LEVEL),
+        )
+        for t in tiles
+    ]
+
+
+@lru_cache(maxsize=32)
+def query_insert_tiles(count_rows: int) -> str:
+    values: str = ", ".join(["(?, ?, ?, ?)"] * count_rows)
+    return f"INSERT OR IGNORE INTO tiles (zoom_level, tile_column, tile_row, tile_data) VALUES {values};"
+
+
+async def insert_mvt_tiles(
+    connection: aiosqlite.Connection,
+    cursor: aiosqlite.Cursor,
+    ts: List[Tuple[int, int, int, bytes]],
+    uncommitted: UncommittedTiles,
+) -> None:
+    # Multi-row VALUES inserts chunk of tiles by one statement
+    for i in range(0, len(ts), MBTILES_INSERT_ROWS):
+        chunk = ts[i : i + MBTILES_INSERT_ROWS]
+        await cursor.execute(
+            query_insert_tiles(len(chunk)), tuple(chain.from_iterable(chunk))
+        )
+        uncommitted.count += len(chunk)
+        # Batches share one transaction, it is committed by count of inserted tiles
+        if uncommitted.count >= MBTILES_COMMIT_ROWS:
+            uncommitted.count = 0
+            await connection.commit()
+
+
 async def init_db_pool(ds: DataSource) -> Tuple[Pool, int]:
     dsn, _ = dsn_postgresql()
     db_pool_size: int = ds.pyr_settings.count_processes or math.ceil(
@@ -13,14 +13,16 @@ from typing import List, Optional, Union, Mapping
 from fastapi import Response, Request, status, BackgroundTasks, FastAPI
 from starlette.exceptions import HTTPException
 
-from server.fapi.utils import MAPTILER_ERROR
+from server.fapi.utils import MAPTILER_ERROR, MAPTILER_ERROR_BYTES
 from server.datasources import DataSource, DataStoreVectorTiles, DataStoreVectorInternal
 from server.fapi.vector.mvt_postgis import generate_mvt
-from server.tile_utils import save_tile_on_disk
-from server.sqlite_db import sqlite_db_connect_async
+from server.tile_utils import save_tile_on_disk, get_mbtiles_connection
 
 logger = logging.getLogger(__name__)
 
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+GZIP_HEADERS: Mapping[str, str] = {"Content-Encoding": "gzip"}
+
 
 async def vector_tile(
     request: Request,
@@ -54,25 +56,21 @@ async def vector_tile(
     elif isinstance(data_store, DataStoreVectorInternal):
         mvt = await generate_mvt(ds, request.app.state.db_pool, z, x, y)
 
-    # Save only not empty tiles
-    if mvt != b"":
-        if ds.compress_tiles:
-            mvt = gzip.compress(mvt)
-            headers = {"Content-Encoding": "gzip"}
-
-        background_tasks.add_task(
-            save_tile, x, y, z, ext, datasource_id, ds.mbtiles, mvt, root_path
-        )
+    # Empty tile is answered without body headers
+    if mvt == b"":
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
 
-    response_code = status.HTTP_204_NO_CONTENT if mvt == b"" else status.HTTP_200_OK
+    # Save only not empty tiles
+    if ds.compress_tiles:
+        mvt = gzip.compress(mvt)
+        headers = GZIP_HEADERS
 
-    return Response(
-        content=mvt,
-        media_type="application/vnd.mapbox-vector-tile",
-        headers=headers,
-        status_code=response_code,
+    background_tasks.add_task(
+        save_tile, x, y, z, ext, datasource_id, ds.mbtiles, mvt, root_path
     )
 
+    return Response(content=mvt, media_type=MVT_MEDIA_TYPE, headers=headers)
+
 
 async def request_tile(
     app: FastAPI,
@@ -128,17 +126,14 @@ async def request_tile(
                 status_response: int = response.status
 
                 # In case of any error, take another key
-                if round(status_response / 100) != 2:
+                if not 200 <= status_response < 300:
                     # On 16 zoom get error 'Out of bounds' and status code = 400
                     body_error: reqsnaked.Bytes = await response.read()
-                    error: str = body_error.as_bytes().decode("utf-8")
-                    if (
-                        status_response == status.HTTP_400_BAD_REQUEST
-                        and error == MAPTILER_ERROR
-                    ) or error == MAPTILER_ERROR:
+                    # Body is compared as bytes, other error bodies are not decoded
+                    if body_error.as_bytes() == MAPTILER_ERROR_BYTES:
                         return Response(
                             status_code=status_response,
-                            content=orjson.dumps({"error": error}),
+                            content=orjson.dumps({"error": MAPTILER_ERROR}),
                             media_type="application/json",
                         )
 
@@ -191,7 +186,7 @@ async def request_tile_without_key(
     status_response: int = response.status
 
     # In case of any error, take another key
-    if round(status_response / 100) != 2:
+    if not 200 <= status_response < 300:
         body_error: reqsnaked.Bytes = await response.read()
         error: str = body_error.as_bytes().decode("utf-8")
 
@@ -229,7 +224,8 @@ async def save_tile(
             root_path, "tiles", datasource_id, f"{datasource_id}.mbtiles"
         )
         if await aio_os.path.isfile(mbtiles_db):
-            connection: aiosqlite.Connection = await sqlite_db_connect_async(mbtiles_db)
+            # Connection is shared by tiles of worker, only cursor is per tile
+            connection: aiosqlite.Connection = await get_mbtiles_connection(mbtiles_db)
             cursor: aiosqlite.Cursor = await connection.cursor()
             try:
                 await cursor.execute(
@@ -260,7 +256,6 @@ async def save_tile(
                 logger.error(f"Error save tiles in DataBase '{mbtiles_db}': {str(e)}")
             finally:
                 await cursor.close()
-                await connection.close()
         else:
             await save_tile_on_disk(x, y, z, tile_file_name, buffer)
     else:
@@ -11,6 +11,28 @@ TABLE_TILES: str = """
     );
 """
 
+# Table is filled in order of tiles, unique index is created after bulk load
+TABLE_TILES_WITHOUT_PK: str = """
+    CREATE TABLE tiles (
+        zoom_level integer NOT NULL,
+        tile_column integer NOT NULL,
+        tile_row integer NOT NULL,
+        tile_data blob
+    );
+"""
+
+INDEX_TILES: str = """
+    CREATE UNIQUE INDEX IF NOT EXISTS tile_index ON tiles (zoom_level, tile_column, tile_row);
+"""
+
+# Retried batches and dynamic tiles saved during pyramid may duplicate tiles
+# while table has no unique index, first copy of tile is kept
+DELETE_DUPLICATE_TILES: str = """
+    DELETE FROM tiles WHERE rowid NOT IN (
+        SELECT min(rowid) FROM tiles GROUP BY zoom_level, tile_column, tile_row
+    );
+"""
+
 TABLE_METADATA: str = """CREATE TABLE metadata (name text, value text);"""
 
 TABLE_GRIDS: str = """
@@ -44,8 +66,26 @@ def create_index(cursor: sqlite3.Cursor):
     cursor.execute("""create unique index name on metadata (name);""")
 
 
-async def async_mbtiles_setup(cursor: aiosqlite.Cursor):
-    await cursor.execute(TABLE_TILES)
+async def async_mbtiles_setup(cursor: aiosqlite.Cursor, deferred_index: bool = False):
+    await cursor.execute(TABLE_TILES_WITHOUT_PK if deferred_index else TABLE_TILES)
     await cursor.execute(TABLE_METADATA)
     await cursor.execute(TABLE_GRIDS)
     await cursor.execute(TABLE_GRID_DATA)
+
+
+async def async_mbtiles_bulk_load_setup(cursor: aiosqlite.Cursor):
+    # Connection only writes tiles of pyramid, bigger page cache and memory map
+    await cursor.execute("""PRAGMA cache_size=-65536;""")
+    await cursor.execute("""PRAGMA mmap_size=268435456;""")
+
+
+async def async_mbtiles_ensure_tiles_index(cursor: aiosqlite.Cursor):
+    # Table without unique index (pyramid interrupted before its end) gets one,
+    # tables with PRIMARY KEY already have unique autoindex
+    await cursor.execute("""PRAGMA index_list(tiles);""")
+    if any(index[2] for index in await cursor.fetchall()):
+        return
+    # Both statements run in one write transaction, no duplicate can slip in between
+    await cursor.execute(DELETE_DUPLICATE_TILES)
+    await cursor.execute(INDEX_TILES)
+    await cursor.execute("""ANALYZE;""")
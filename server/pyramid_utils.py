@@ -11,7 +11,7 @@ import psutil
 from pathlib import Path
 from typing import Any, Dict, Optional, List, Union, Tuple
 
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, field_validator
 from starlette.exceptions import HTTPException
 from starlette.concurrency import run_in_threadpool
 from fastapi import status
@@ -35,6 +35,23 @@ from server.robyn import (
 
 logger = logging.getLogger(__name__)
 
+PYRAMID_RESAMPLING = frozenset(
+    (
+        "average",
+        "antialias",
+        "nearest",
+        "bilinear",
+        "cubic",
+        "cubicspline",
+        "lanczos",
+        "min",
+        "max",
+        "med",
+    )
+)
+TILE_DRIVERS = frozenset(("PNG",))
+TILE_SIZES = frozenset((128, 256, 512, 1024))
+
 
 class Pyramid(BaseModel):
     verbose: Optional[bool] = False
@@ -57,51 +74,29 @@ class Pyramid(BaseModel):
     pixel_selection_method: Optional[str] = "FirstMethod"
     merge: Optional[bool] = True
 
-    @validator("resampling")
+    @field_validator("resampling")
     def validate_resampling(cls, value):
-        if value not in [
-            "average",
-            "antialias",
-            "nearest",
-            "bilinear",
-            "cubic",
-            "cubicspline",
-            "lanczos",
-            "min",
-            "max",
-            "med",
-        ]:
+        if value not in PYRAMID_RESAMPLING:
             raise ValueError(
                 f"Pyramid.resampling must have one of the values ['average', 'antialias', 'near', 'bilinear', 'cubic', 'cubicspline', 'lanczos']"
             )
         return value
 
-    @validator("resampling_warp")
+    @field_validator("resampling_warp")
     def validate_resampling_warp(cls, value):
-        if value not in [
-            "average",
-            "antialias",
-            "nearest",
-            "bilinear",
-            "cubic",
-            "cubicspline",
-            "lanczos",
-            "min",
-            "max",
-            "med",
-        ]:
+        if value not in PYRAMID_RESAMPLING:
             raise ValueError(
                 f"Pyramid.resampling must have one of the values ['average', 'antialias', 'near', 'bilinear', 'cubic', 'cubicspline', 'lanczos', 'min', 'max', 'med']"
             )
         return value
 
-    @validator("tiledriver")
+    @field_validator("tiledriver")
     def validate_tiledriver(cls, value):
-        if value not in ["PNG"]:
+        if value not in TILE_DRIVERS:
             raise ValueError(f"Pyramid.tiledriver must have one of the values [PNG]")
         return value
 
-    @validator("tile_size")
+    @field_validator("tile_size")
     def validate_tile_size(cls, value):
         if value > 512 or value < 128:
             raise ValueError(
@@ -109,7 +104,7 @@ class Pyramid(BaseModel):
             )
         return value
 
-    @validator("count_processes")
+    @field_validator("count_processes")
     def validate_count_processes(cls, value):
         cpus = multiprocessing.cpu_count()
         if value > cpus or value < 1:
@@ -118,7 +113,7 @@ class Pyramid(BaseModel):
             )
         return value
 
-    @validator("zoom")
+    @field_validator("zoom")
     def validate_zoom(cls, value):
         if not isinstance(value, (list, tuple)):
             raise ValueError(
@@ -134,7 +129,7 @@ class Pyramid(BaseModel):
             )
         return value
 
-    @validator("pixel_selection_method")
+    @field_validator("pixel_selection_method")
     def validate_pixel_selection_method(cls, value):
         if value not in PIXEL_SELECTION_METHOD:
             raise ValueError(
@@ -317,7 +312,7 @@ def json_to_tiles_options(json_body: Dict[str, Any]) -> TilesOptions:
         ts = json_body["tile_size"]
         if not isinstance(ts, int):
             raise Exception(f"'tile_size' must be int, got '{ts}'")
-        if ts not in [128, 256, 512, 1024]:
+        if ts not in TILE_SIZES:
             raise Exception(
                 f"'tile_size' should take values [128, 256, 512, 1024], got '{ts}'"
             )
@@ -411,7 +406,7 @@ def json_to_mosaic_options(assets_dir: str, json_body: Dict[str, Any]) -> Mosaic
         ts = json_body["tile_size"]
         if not isinstance(ts, int):
             raise Exception(f"'tile_size' must be int, got '{ts}'")
-        if ts not in [128, 256, 512, 1024]:
+        if ts not in TILE_SIZES:
             raise Exception(
                 f"'tile_size' should take values [128, 256, 512, 1024], got '{ts}'"
             )
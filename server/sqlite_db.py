@@ -38,12 +38,14 @@ def sqlite_db_connect(db_name: str) -> sqlite3.Connection:
 
 
 def optimize_connection(cursor: sqlite3.Cursor) -> None:
+    # Page size of new database can't be changed after switching to WAL mode
+    cursor.execute("""PRAGMA page_size=65536;""")
     cursor.execute("""PRAGMA synchronous=NORMAL;""")
     cursor.execute("""PRAGMA journal_mode=WAL;""")
     cursor.execute("""PRAGMA optimize;""")
     cursor.execute("""PRAGMA analysis_limit=8192;""")
     cursor.execute("""PRAGMA cache_size=-2000;""")
-    cursor.execute("""PRAGMA page_size=65536;""")
+    cursor.execute("""PRAGMA temp_store=MEMORY;""")
     cursor.execute("""PRAGMA foreign_keys=1;""")
     cursor.execute("""PRAGMA busy_timeout=240000;""")
 
@@ -95,12 +97,14 @@ async def sqlite_db_connect_async(db_name: str) -> aiosqlite.Connection:
 
 
 async def optimize_connection_async(cursor: aiosqlite.Cursor) -> None:
+    # Page size of new database can't be changed after switching to WAL mode
+    await cursor.execute("""PRAGMA page_size=65536;""")
     await cursor.execute("""PRAGMA synchronous=NORMAL;""")
     await cursor.execute("""PRAGMA journal_mode=WAL;""")
     await cursor.execute("""PRAGMA optimize;""")
     await cursor.execute("""PRAGMA analysis_limit=8192;""")
     await cursor.execute("""PRAGMA cache_size=-2000;""")
-    await cursor.execute("""PRAGMA page_size=65536;""")
+    await cursor.execute("""PRAGMA temp_store=MEMORY;""")
     await cursor.execute("""PRAGMA foreign_keys=1;""")
     await cursor.execute("""PRAGMA busy_timeout=240000;""")
 
@@ -1,6 +1,7 @@
 import logging
 import os
 import sqlite3
+import threading
 import aiosqlite
 import rio_tiler as _
 import asyncio
@@ -9,6 +10,7 @@ import aiofiles.os as aio_os
 import numpy as np
 
 from pathlib import Path
+from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 from morecantile.commons import BoundingBox, Tile
 from morecantile.defaults import tms
@@ -24,7 +26,7 @@ from starlette.exceptions import HTTPException
 
 from raster_tiles.mosaic.reader import mosaic_reader
 from raster_tiles.utils import encode_raster_to_rgba
-from server.sqlite_db import sqlite_db_connect_async
+from server.sqlite_db import sqlite_db_connect, sqlite_db_connect_async
 from server.datasources import EXTENSIONS
 from raster_tiles.defaults import (
     PIXEL_SELECTION_METHOD,
@@ -60,16 +62,21 @@ class NeighborTile:
 
         parent_dir: Path = Path(__file__).parents[1]
 
+        # Coordinates are formatted once for the file name and the 'Nts' header
+        x: str = str(t.x)
+        y: str = str(t.y)
+        z: str = str(t.z)
         tile_file_name: str = os.path.join(
             f"{parent_dir}",
             "tiles",
             datasource_id,
-            f"{t.z}",
-            f"{t.x}",
-            f"{t.y}.{ext}",
+            z,
+            x,
+            f"{y}.{ext}",
         )
 
         self.tile_file_name = tile_file_name
+        self.header: str = f"{x}_{y}_{z}"
 
 
 class NeighborMosaicTile:
@@ -81,16 +88,21 @@ class NeighborMosaicTile:
 
         parent_dir: Path = Path(__file__).parents[1]
 
+        # Coordinates are formatted once for the file name and the 'Nts' header
+        x: str = str(t.x)
+        y: str = str(t.y)
+        z: str = str(t.z)
         tile_file_name: str = os.path.join(
             f"{parent_dir}",
             "tiles",
             datasource_id,
-            f"{t.z}",
-            f"{t.x}",
-            f"{t.y}.{ext}",
+            z,
+            x,
+            f"{y}.{ext}",
         )
 
         self.tile_file_name = tile_file_name
+        self.header: str = f"{x}_{y}_{z}"
 
 
 def meta_tile(
@@ -556,6 +568,37 @@ async def save_mbtile(mbtiles_db: str, x: int, y: int, z: int, buffer: bytes) ->
         await connection.close()
 
 
+# Connections to mbtiles of dynamic tiles are kept per worker:
+# mbtiles_db -> (inode of file, connection), pyramid recreates file with new inode
+_mbtiles_connections: Dict[str, Tuple[int, aiosqlite.Connection]] = {}
+_mbtiles_lock = asyncio.Lock()
+
+
+async def get_mbtiles_connection(mbtiles_db: str) -> aiosqlite.Connection:
+    inode: int = (await aio_os.stat(mbtiles_db)).st_ino
+    async with _mbtiles_lock:
+        cached: Optional[Tuple[int, aiosqlite.Connection]] = _mbtiles_connections.get(
+            mbtiles_db
+        )
+        if cached is not None and cached[0] == inode:
+            return cached[1]
+        if cached is not None:
+            await cached[1].close()
+        connection: aiosqlite.Connection = await sqlite_db_connect_async(mbtiles_db)
+        _mbtiles_connections[mbtiles_db] = (inode, connection)
+        return connection
+
+
+async def close_mbtiles_connections() -> None:
+    async with _mbtiles_lock:
+        for inode, connection in _mbtiles_connections.values():
+            try:
+                await connection.close()
+            except Exception as e:
+                logger.error(f"Error close connection to MBTiles: {e}")
+        _mbtiles_connections.clear()
+
+
 async def save_tile_on_disk(
     x: int, y: int, z: int, tile_file_name: str, buffer: bytes
 ) -> None:
@@ -593,21 +636,40 @@ async def get_mbtile(mbtiles_db: str, z: int, x: int, y: int) -> Optional[sqlite
     return None
 
 
+QUERY_TILE_JOB: str = (
+    "SELECT src_file, data_bands_count, tile_driver, tile_extension, tile_size, profile, querysize, xyz, in_file, input_file, has_alpha_band, nodata, encode_to_rgba, pixel_selection_method, resampling_method, merge from tile_job;"
+)
+
+# Connections to dataset dbs are kept per worker: db_path -> (inode of file, connection)
+# A rebuilt db has a new inode, so the connection to the old file is replaced
+_tile_job_connections: Dict[str, Tuple[int, sqlite3.Connection]] = {}
+_tile_job_lock = threading.Lock()
+
+
+def read_tile_job(db_path: str) -> Optional[sqlite3.Row]:
+    inode: int = os.stat(db_path).st_ino
+    with _tile_job_lock:
+        cached: Optional[Tuple[int, sqlite3.Connection]] = _tile_job_connections.get(
+            db_path
+        )
+        if cached is not None and cached[0] == inode:
+            connection: sqlite3.Connection = cached[1]
+        else:
+            if cached is not None:
+                cached[1].close()
+            connection = sqlite_db_connect(db_path)
+            _tile_job_connections[db_path] = (inode, connection)
+        return connection.execute(QUERY_TILE_JOB).fetchone()
+
+
 async def get_tile_job(db_path: str) -> Optional[sqlite3.Row]:
     try:
-        connection: aiosqlite.Connection = await sqlite_db_connect_async(db_path)
-        cursor: aiosqlite.Cursor = await connection.cursor()
-        sql: str = (
-            "SELECT src_file, data_bands_count, tile_driver, tile_extension, tile_size, profile, querysize, xyz, in_file, input_file, has_alpha_band, nodata, encode_to_rgba, pixel_selection_method, resampling_method, merge from tile_job;"
+        tile_job: Optional[sqlite3.Row] = await asyncio.to_thread(
+            read_tile_job, db_path
         )
-        cur_exec: aiosqlite.Cursor = await cursor.execute(sql)
-        tile_job: Optional[sqlite3.Row] = await cur_exec.fetchone()
     except Exception as e:
         logger.error(f"'get_tile_job': error get tile job: {e}")
         return None
-    finally:
-        await cursor.close()
-        await connection.close()
 
     if tile_job:
         return tile_job
@@ -615,6 +677,14 @@ async def get_tile_job(db_path: str) -> Optional[sqlite3.Row]:
     return None
 
 
+@dataclass(slots=True)
+class TileJobCache:
+    tile_job: Optional[sqlite3.Row]
+    db_path: str
+    modified_time: float
+    last_check: float
+
+
 async def save_neighbors_tiles(
     mbtiles: bool, mbtiles_db: str, neighbors: List[NeighborTile]
 ) -> None: